@@ -19,23 +19,74 @@ import time
 import hashlib
 import logging
 import math
+import bisect
 import requests
-import statistics
+import queue
+import threading
+import concurrent.futures
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from collections import Counter, OrderedDict
+from functools import lru_cache
 from datetime import datetime
-from flask import Flask, request, jsonify, render_template_string
+from urllib.parse import urlsplit
+from flask import Flask, Response, request, jsonify, render_template_string
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 
+# Optional: google-re2 gives linear-time matching for patterns run over
+# scraped (untrusted) HTML. The stdlib engine is the fallback. Use search()/
+# findall() only: re2's match(text, pos) costs O(len(text)) per call, so a
+# per-position match loop goes quadratic (tests/test_extract.py).
+try:
+    import re2 as _re
+except ImportError:
+    _re = re
+
+# Optional: orjson decodes/encodes the provider payloads and our reports
+# several times faster than the stdlib; same output shape either way.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def json_loads(data):
+    """Parse JSON from bytes or str."""
+    return orjson.loads(data) if orjson else json.loads(data)
+
+
+def json_dumps(obj, sort_keys=False):
+    """Serialize to compact UTF-8 bytes; unknown types fall back to str()."""
+    if orjson:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+    return json.dumps(obj, sort_keys=sort_keys, default=str, ensure_ascii=False, separators=(",", ":")).encode()
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 log = logging.getLogger("askcarbuddy")
 
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Routes jsonify() and request.get_json() through orjson."""
+
+    def dumps(self, obj, **kwargs):
+        return json_dumps(obj, sort_keys=self.sort_keys).decode()
+
+    def loads(self, s, **kwargs):
+        return json_loads(s)
+
+
 app = Flask(__name__)
+if orjson:
+    app.json = OrjsonProvider(app)
 CORS(app)
 
 # Initialize trace DB on startup
 try:
     init_trace_db()
 except Exception as e:
-    log.warning(f'Trace DB init deferred: {e}')
+    log.warning('Trace DB init deferred: %s', e)
 
 
 AUTODEV_API_KEY   = os.getenv("AUTODEV_API_KEY", "")
@@ -52,6 +103,158 @@ GROQ_MODEL        = "llama-3.3-70b-versatile"
 EXA_URL           = "https://api.exa.ai/contents"
 EXA_SEARCH_URL    = "https://api.exa.ai/search"
 
+# API calls identify as us; listing pages are fetched as a desktop browser
+API_USER_AGENT    = "AskCarBuddy/9.1"
+BROWSER_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# Per-host auth headers, built once instead of per call
+AUTODEV_HEADERS   = {"Authorization": f"Bearer {AUTODEV_API_KEY}"}
+EXA_HEADERS       = {"x-api-key": EXA_API_KEY, "Content-Type": "application/json"}
+GROQ_HEADERS      = {"Authorization": f"Bearer {GROQ_API_KEY}", "Content-Type": "application/json"}
+
+# One pooled session for every outbound call so repeat hits to the same
+# host (auto.dev, nhtsa, groq, exa) reuse the TCP+TLS connection.
+# Idempotent GETs retry on rate limits and server errors with our own short
+# backoff; POSTs to Groq/Exa are not retried by urllib3. Retry-After is
+# ignored: urllib3 would sleep for whatever the header says, uncapped and on
+# top of the request timeout.
+SESSION = requests.Session()
+SESSION.headers["User-Agent"] = API_USER_AGENT
+_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32,
+                       max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504],
+                                         respect_retry_after_header=False))
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+# NHTSA's free APIs throw the odd transient 5xx and stall on connect under
+# load: retry a little harder there, and give up on a hung connect after 3s
+# so it gets retried instead of eating a whole 10s timeout.
+_nhtsa_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32,
+                             max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504],
+                                               respect_retry_after_header=False))
+SESSION.mount("https://api.nhtsa.gov/", _nhtsa_adapter)
+SESSION.mount("https://vpic.nhtsa.dot.gov/", _nhtsa_adapter)
+NHTSA_TIMEOUT = (3, 7)  # (connect, read)
+# Arbitrary dealer/listing pages (the fallback scrape) get their own session:
+# a 429 from a site we don't control is an answer, not something to retry,
+# and only a gateway error gets one quick second try.
+PAGE_SESSION = requests.Session()
+_page_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32,
+                            max_retries=Retry(total=1, backoff_factor=0.3, status_forcelist=[502, 503, 504],
+                                              respect_retry_after_header=False))
+PAGE_SESSION.mount("https://", _page_adapter)
+PAGE_SESSION.mount("http://", _page_adapter)
+
+# Optional: Groq and Exa speak HTTP/2, which multiplexes our concurrent
+# section/research calls over one connection per host. Used when httpx
+# with h2 is installed; otherwise those calls go through SESSION, which
+# exposes the same post(url, json=, headers=, timeout=) surface.
+try:
+    import httpx
+    import h2  # noqa: F401 -- httpx needs it for http2=True
+    HTTP2_CLIENT = httpx.Client(http2=True, timeout=30.0, headers={"User-Agent": API_USER_AGENT},
+                                limits=httpx.Limits(max_connections=32, max_keepalive_connections=16))
+except ImportError:
+    HTTP2_CLIENT = SESSION
+
+# Shared pool for fanning out independent provider calls. Keep it no larger
+# than the HTTP pool above so concurrent calls never wait on a connection.
+EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=8)
+
+
+def future_result(fut, default=None, label="Background call", timeout=None):
+    """fut.result(), but a failed or (given timeout) slow call is logged and
+    yields default so one dead provider can't take down the whole analysis.
+    fut may be None."""
+    if fut is None:
+        return default
+    try:
+        return fut.result(timeout=timeout)
+    except concurrent.futures.TimeoutError:
+        log.warning("%s timed out after %.1fs", label, timeout)
+        return default
+    except Exception as e:
+        log.warning("%s failed: %s", label, e)
+        return default
+
+
+def submit_tracked(fn, *args, **kwargs):
+    """EXECUTOR.submit(), noting on the future (fut.run_info) when the call
+    was queued and when a worker actually picked it up, for join_running()."""
+    info = {"submitted": time.monotonic(), "started": None, "running": threading.Event()}
+    def run():
+        info["started"] = time.monotonic()
+        info["running"].set()
+        return fn(*args, **kwargs)
+    fut = EXECUTOR.submit(run)
+    fut.run_info = info
+    return fut
+
+
+def join_running(fut, budget, label, max_queued, default=None):
+    """future_result() for a submit_tracked() future, where budget counts from
+    when the call started running: time spent queued behind other requests'
+    calls on EXECUTOR doesn't eat into it (up to max_queued seconds)."""
+    if fut is None:
+        return default
+    info = fut.run_info
+    if not info["running"].wait(max(0, info["submitted"] + max_queued - time.monotonic())):
+        fut.cancel()
+        log.warning("%s still queued after %.1fs; skipped", label, max_queued)
+        return default
+    queued = info["started"] - info["submitted"]
+    if queued >= 1:
+        log.info("%s queued %.1fs before running", label, queued)
+    try:
+        return fut.result(timeout=max(0, info["started"] + budget - time.monotonic()))
+    except concurrent.futures.TimeoutError:
+        log.warning("%s timed out after running %.1fs (queued %.1fs)", label, budget, queued)
+        return default
+    except Exception as e:
+        log.warning("%s failed: %s", label, e)
+        return default
+
+
+class CircuitBreaker:
+    """After fail_max consecutive failures, allow() refuses calls for
+    reset_timeout seconds so an upstream outage costs nothing instead of a
+    full timeout per request; then one trial call per window is let through."""
+
+    def __init__(self, name, fail_max=5, reset_timeout=30):
+        self.name = name
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._opened_at = time.monotonic()  # half-open: this caller is the trial
+                return True
+            return False
+
+    def success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.fail_max and self._opened_at is None:
+                log.warning("Circuit open for %s after %s failures", self.name, self._failures)
+                self._opened_at = time.monotonic()
+
+    @property
+    def is_open(self):
+        return self._opened_at is not None
+
+
+NHTSA_BREAKER = CircuitBreaker("nhtsa")
+
 
 # ==============================================================
 # SELF-IMPROVING AGENT â PHASE 1: TRACE STORE + LEARNING LOOP
@@ -59,7 +262,6 @@ EXA_SEARCH_URL    = "https://api.exa.ai/search"
 
 import sqlite3
 import uuid
-import threading
 
 DB_PATH = os.getenv("TRACE_DB", "askcarbuddy_traces.db")
 _db_lock = threading.Lock()
@@ -177,7 +379,7 @@ def save_trace(trace_data):
         ))
         conn.commit()
         conn.close()
-    log.info(f"Trace saved: {trace_id}")
+    log.info("Trace saved: %s", trace_id)
     return trace_id
 
 def save_reward(trace_id, signal_type, signal_value, metadata=None):
@@ -185,18 +387,18 @@ def save_reward(trace_id, signal_type, signal_value, metadata=None):
         conn = get_db()
         conn.execute(
             "INSERT INTO rewards (trace_id, signal_type, signal_value, metadata) VALUES (?,?,?,?)",
-            (trace_id, signal_type, signal_value, json.dumps(metadata) if metadata else None)
+            (trace_id, signal_type, signal_value, json_dumps(metadata).decode() if metadata else None)
         )
         conn.commit()
         conn.close()
-    log.info(f"Reward saved: {trace_id} | {signal_type}={signal_value}")
+    log.info("Reward saved: %s | %s=%s", trace_id, signal_type, signal_value)
 
 def save_page_event(trace_id, event_type, section_name=None, duration_ms=None, scroll_depth=None, metadata=None):
     with _db_lock:
         conn = get_db()
         conn.execute(
             "INSERT INTO page_events (trace_id, event_type, section_name, duration_ms, scroll_depth, metadata) VALUES (?,?,?,?,?,?)",
-            (trace_id, event_type, section_name, duration_ms, scroll_depth, json.dumps(metadata) if metadata else None)
+            (trace_id, event_type, section_name, duration_ms, scroll_depth, json_dumps(metadata).decode() if metadata else None)
         )
         conn.commit()
         conn.close()
@@ -313,46 +515,223 @@ load();
 </html>"""
 
 
+# ==============================================================
+# RESPONSE CACHES
+# ==============================================================
+
+# Optional: with REDIS_URL set (and redis installed) named caches are also
+# written to Redis, so every gunicorn worker shares them and they survive
+# restarts. The in-process dict stays in front as the first tier.
+REDIS = None
+if os.getenv("REDIS_URL"):
+    try:
+        import redis
+        REDIS = redis.Redis.from_url(os.environ["REDIS_URL"], socket_timeout=0.25, socket_connect_timeout=0.25)
+    except ImportError:
+        log.warning("REDIS_URL is set but redis isn't installed; using in-process caches only")
+
+
+class TTLCache:
+    """Thread-safe dict with a per-cache TTL; evicts the oldest entry when full.
+    get() returns None on a miss, so never store None. Given a name, values
+    (which must then be JSON-serializable) are also shared through REDIS.
+    Hit/miss counts are kept for /health."""
+
+    def __init__(self, maxsize, ttl, name=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self.shared = REDIS is not None and name is not None
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, allow_stale=False):
+        """allow_stale returns a locally held entry even past its TTL -- the
+        fallback when the upstream it caches is failing, or the copy to
+        revalidate. Those lookups skip Redis (which drops expired keys) and
+        the hit/miss counts."""
+        if allow_stale:
+            return self._get_local(key, allow_stale=True)
+        value = self._get_local(key)
+        if value is None and self.shared:
+            value = self._get_shared(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        log.debug("Cache %s %s: %r", self.name, "miss" if value is None else "hit", key)
+        return value
+
+    def set(self, key, value):
+        self._set_local(key, value, self.ttl)
+        if self.shared:
+            try:
+                REDIS.set(self._redis_key(key), json_dumps(value), ex=self.ttl)
+            except Exception as e:
+                log.warning("Redis set failed (%s): %s", self.name, e)
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+    def _get_local(self, key, allow_stale=False):
+        # Expired entries stay until overwritten or evicted, for allow_stale
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic() and not allow_stale:
+                return None
+            return value
+
+    def _get_shared(self, key):
+        try:
+            pipe = REDIS.pipeline()
+            pipe.get(self._redis_key(key))
+            pipe.pttl(self._redis_key(key))
+            raw, pttl = pipe.execute()
+        except Exception as e:
+            log.warning("Redis get failed (%s): %s", self.name, e)
+            return None
+        if raw is None:
+            return None
+        value = json_loads(raw)
+        self._set_local(key, value, pttl / 1000 if pttl and pttl > 0 else self.ttl)
+        return value
+
+    def _set_local(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def _redis_key(self, key):
+        return f"acb:{self.name}:{key!r}"
+
+# Model-year recalls/complaints change on a scale of days (and a stale
+# record is the fallback during NHTSA outages); local listing supply on a
+# scale of hours. Cached values are shared -- don't mutate them.
+_NHTSA_CACHE = TTLCache(maxsize=4096, ttl=7 * 86400, name="nhtsa")
+_COMP_CACHE = TTLCache(maxsize=2048, ttl=6 * 3600, name="comps")
+# Auto.dev record per VIN. The specs never change, but the record also
+# carries the live asking price and mileage, so it can't be kept for days.
+_VIN_CACHE = TTLCache(maxsize=8192, ttl=6 * 3600, name="vin")
+# NHTSA vPIC decode per VIN -- what the VIN encodes is fixed at build time
+_VIN_DECODE_CACHE = TTLCache(maxsize=8192, ttl=30 * 86400, name="vindecode")
+# Dealer review snippets drift slowly
+_DEALER_CACHE = TTLCache(maxsize=2048, ttl=12 * 3600, name="dealer")
+# Scraped listing page (text, image links) per URL; short-lived because the
+# asking price on the page is what the report is about
+_SCRAPE_CACHE = TTLCache(maxsize=1024, ttl=3600, name="scrape")
+# Groq output keyed by a hash of the exact prompt: identical contexts (same
+# listing analyzed twice) skip the LLM call. Low temperature keeps it stable.
+_GROQ_CACHE = TTLCache(maxsize=2000, ttl=6 * 3600, name="groq")
+# Finished reports keyed by the request body: a shared listing link gets
+# re-analyzed by everyone who opens it, so serve repeats without any I/O.
+_REPORT_CACHE = TTLCache(maxsize=1024, ttl=600, name="report")
+# Fields extracted from a scraped page, keyed by a digest of the page text
+# (Exa returns the same text for an unchanged listing)
+_EXTRACT_CACHE = TTLCache(maxsize=1024, ttl=1800, name="extract")
+
+CACHES = [_NHTSA_CACHE, _COMP_CACHE, _VIN_CACHE, _VIN_DECODE_CACHE, _DEALER_CACHE, _SCRAPE_CACHE, _GROQ_CACHE, _REPORT_CACHE, _EXTRACT_CACHE]
+
+def prompt_cache_key(*parts):
+    return hashlib.blake2b("\x00".join(parts).encode(), digest_size=16).hexdigest()
+
+def report_cache_key(input_data):
+    canon = dict(input_data)
+    if isinstance(canon.get("url"), str):
+        canon["url"] = canon["url"].strip().lower()
+    return hashlib.blake2b(json_dumps(canon, sort_keys=True), digest_size=16).digest()
+
 
 # ==============================================================
 # HELPERS
 # ==============================================================
 
+_NON_PRICE_RE = re.compile(r'[^\d.]')
+_NON_DIGIT_RE = re.compile(r'[^\d]')
+
 def parse_price(val):
     if val is None: return None
     if isinstance(val, (int, float)): return int(val) if val > 0 else None
-    s = re.sub(r'[^\d.]', '', str(val).strip())
-    try:
-        p = int(float(s))
-        return p if p > 0 else None
-    except: return None
+    return _parse_price_str(str(val))
 
 def parse_mileage(val):
     if val is None: return None
     if isinstance(val, (int, float)): return int(val) if val > 0 else None
-    s = re.sub(r'[^\d]', '', str(val).strip())
+    return _parse_mileage_str(str(val))
+
+# Comp tables repeat the same raw strings ("$18,995", "45,000 mi") across
+# records and requests, so the string path is memoized
+@lru_cache(maxsize=8192)
+def _parse_price_str(val):
+    s = _NON_PRICE_RE.sub('', val.strip())
+    try:
+        p = int(float(s))
+        return p if p > 0 else None
+    # OverflowError: a digit run too long for a float ends up as inf
+    except (ValueError, TypeError, OverflowError): return None
+
+@lru_cache(maxsize=8192)
+def _parse_mileage_str(val):
+    s = _NON_DIGIT_RE.sub('', val.strip())
     try:
         m = int(s)
         return m if m > 0 else None
-    except: return None
+    except (ValueError, TypeError): return None
 
 
 # ==============================================================
 # URL PARSER
 # ==============================================================
 
-def parse_listing_url(url):
-    url = url.strip()
+_VIN_URL_RE = re.compile(r'[/=]([A-HJ-NPR-Z0-9]{17})(?:[/&?.]|$)', re.IGNORECASE)
+_VIN_ANY_RE = re.compile(r'[A-HJ-NPR-Z0-9]{17}', re.IGNORECASE)
+# Model-year codes valid at VIN position 10
+_VIN_YEAR_CHARS = frozenset('ABCDEFGHJKLMNPRSTVWXY123456789')
+_URL_YMM_RE = re.compile(r'(20\d{2}|19\d{2})[-/_]([a-z]+)[-/_]([a-z0-9]+)')
+# Listing sites keyed by registrable domain (last two host labels) -> source
+# label, so a listing host and any of its subdomains resolve with a single
+# dict lookup. Matched against the URL's host only, so a dealer/blog URL that
+# merely mentions "cars.com" in its path or query stays "dealer".
+LISTING_SOURCES = {
+    "cars.com": "cars.com",
+    "autotrader.com": "autotrader",
+    "cargurus.com": "cargurus",
+}
+
+def _listing_host(url):
+    parts = urlsplit(url if "//" in url else "//" + url)
+    return (parts.hostname or ""), parts.path
+
+def _listing_source(url):
+    host, path = _listing_host(url)
+    domain = ".".join(host.rsplit(".", 2)[-2:])
+    label = LISTING_SOURCES.get(domain)
+    if label:
+        return label
+    if domain == "facebook.com" and path.startswith("/marketplace"):
+        return "facebook"
+    return "dealer"
+
+@lru_cache(maxsize=8192)
+def _parse_listing_url(url):
     info = {"source": "unknown", "url": url}
-    if "cars.com" in url: info["source"] = "cars.com"
-    elif "autotrader.com" in url: info["source"] = "autotrader"
-    elif "cargurus.com" in url: info["source"] = "cargurus"
-    elif "facebook.com/marketplace" in url: info["source"] = "facebook"
-    else: info["source"] = "dealer"
-    vin_match = re.search(r'[/=]([A-HJ-NPR-Z0-9]{17})(?:[/&?.]|$)', url, re.IGNORECASE)
+    info["source"] = _listing_source(url)
+    vin_match = _VIN_URL_RE.search(url)
     if vin_match: info["vin"] = vin_match.group(1).upper()
     return info
 
+def parse_listing_url(url):
+    # Copy: the memoized dict is shared between callers
+    return dict(_parse_listing_url(url.strip()))
+
 
 # ==============================================================
 # SCRAPER
@@ -364,113 +743,202 @@ def extract_vin_from_url(url):
     # Position 1: country (1-5=NA, J=Japan, K=Korea, S-W=Europe, etc.)
     # Position 9: check digit (0-9 or X)
     # Position 10: model year (A-Y excluding I,O,Q,U,Z or 1-9)
-    vin_match = re.search(r'[A-HJ-NPR-Z0-9]{17}', url, re.IGNORECASE)
+    vin_match = _VIN_ANY_RE.search(url)
     if vin_match:
+        # The search already matched exactly 17 VIN characters
         candidate = vin_match.group(0).upper()
-        if re.match(r'^[A-HJ-NPR-Z0-9]{17}$', candidate):
-            # Basic VIN validation: position 10 must be valid model year code
-            year_char = candidate[9]
-            valid_year_chars = set('ABCDEFGHJKLMNPRSTVWXY123456789')
-            if year_char not in valid_year_chars:
-                return None
-            # Position 1 must be a valid country code (not a hex-only sequence)
-            # Reject if it looks like a hex hash (all chars are 0-9, A-F)
-            if all(c in '0123456789ABCDEF' for c in candidate):
-                return None  # Likely a hex hash, not a VIN
-            return candidate
+        # Basic VIN validation: position 10 must be valid model year code
+        if candidate[9] not in _VIN_YEAR_CHARS:
+            return None
+        # Position 1 must be a valid country code (not a hex-only sequence)
+        # Reject if it looks like a hex hash (all chars are 0-9, A-F)
+        if all(c in '0123456789ABCDEF' for c in candidate):
+            return None  # Likely a hex hash, not a VIN
+        return candidate
     return None
 
 def extract_ymm_from_url(url):
     """Extract year/make/model from URL path (common dealer URL format)."""
     path = url.lower().split('?')[0]
-    ymm = re.search(r'(20\d{2}|19\d{2})[-/_]([a-z]+)[-/_]([a-z0-9]+)', path)
+    ymm = _URL_YMM_RE.search(path)
     if ymm:
         return {"year": int(ymm.group(1)), "make": ymm.group(2).title(), "model": ymm.group(3).title()}
     return {}
 
+# vPIC columns read by vin_identity() and vin_specs(); the rest of the
+# ~140-column row is dropped before caching
+_VPIC_FIELDS = ("ModelYear", "Make", "Model", "Trim", "Series", "BodyClass", "DriveType",
+                "FuelTypePrimary", "EngineCylinders", "DisplacementL", "EngineModel",
+                "TransmissionStyle", "PlantCity", "PlantCountry", "GVWR",
+                "ElectrificationLevel", "BatteryType", "EVDriveUnit")
+
 def nhtsa_vin_decode(vin):
-    """Decode VIN via NHTSA Ã¢ÂÂ FREE, reliable, gives year/make/model/trim/specs."""
+    """Decode VIN via NHTSA Ã¢ÂÂ FREE, reliable, gives year/make/model/trim/specs.
+    Returns the decoded row trimmed to _VPIC_FIELDS ({} on failure); one call
+    serves both vin_identity() and vin_specs()."""
+    key = vin.upper()
+    cached = _VIN_DECODE_CACHE.get(key)
+    if cached is not None:
+        return cached
     try:
-        resp = requests.get(f"https://vpic.nhtsa.dot.gov/api/vehicles/DecodeVinValues/{vin}?format=json", timeout=10)
+        resp = SESSION.get(f"{NHTSA_VIN_DECODE}/{vin}", params={"format": "json"}, timeout=NHTSA_TIMEOUT)
         if resp.status_code == 200:
-            r = resp.json().get("Results", [{}])[0]
-            info = {}
-            if r.get("ModelYear"): info["year"] = int(r["ModelYear"])
-            if r.get("Make"): info["make"] = r["Make"].title()
-            if r.get("Model"): info["model"] = r["Model"]
-            if r.get("Trim") and "/" not in r["Trim"]: info["trim"] = r["Trim"]
-            if r.get("BodyClass"): info["body"] = r["BodyClass"]
-            if r.get("DriveType"): info["drive_type"] = r["DriveType"]
-            if r.get("FuelTypePrimary"): info["fuel_type"] = r["FuelTypePrimary"]
-            if r.get("EngineCylinders"): info["engine_cylinders"] = r["EngineCylinders"]
-            if r.get("DisplacementL"): info["engine_size"] = f"{r['DisplacementL']}L"
-            if r.get("TransmissionStyle"): info["transmission"] = r["TransmissionStyle"]
-            info["vin"] = vin
-            log.info(f"NHTSA decode: {info.get('year')} {info.get('make')} {info.get('model')}")
-            return info
+            r = (json_loads(resp.content).get("Results") or [{}])[0]
+            row = {k: r[k] for k in _VPIC_FIELDS if r.get(k)}
+            log.info("NHTSA decode: %s %s %s", row.get("ModelYear"), row.get("Make"), row.get("Model"))
+            if row.get("Make"):
+                _VIN_DECODE_CACHE.set(key, row)
+            return row
     except Exception as e:
-        log.warning(f"NHTSA decode failed: {e}")
+        log.warning("NHTSA decode failed: %s", e)
     return {}
 
+def vin_identity(row, vin):
+    """Vehicle fields (year/make/model/trim/...) from a nhtsa_vin_decode row."""
+    if not row: return {}
+    info = {}
+    if str(row.get("ModelYear", "")).isdigit(): info["year"] = int(row["ModelYear"])
+    if row.get("Make"): info["make"] = row["Make"].title()
+    if row.get("Model"): info["model"] = row["Model"]
+    if row.get("Trim") and "/" not in row["Trim"]: info["trim"] = row["Trim"]
+    if row.get("BodyClass"): info["body"] = row["BodyClass"]
+    if row.get("DriveType"): info["drive_type"] = row["DriveType"]
+    if row.get("FuelTypePrimary"): info["fuel_type"] = row["FuelTypePrimary"]
+    if row.get("EngineCylinders"): info["engine_cylinders"] = row["EngineCylinders"]
+    if row.get("DisplacementL"): info["engine_size"] = f"{row['DisplacementL']}L"
+    if row.get("TransmissionStyle"): info["transmission"] = row["TransmissionStyle"]
+    info["vin"] = vin
+    return info
+
+# Exa page text only feeds field extraction; title, price, mileage and VIN
+# sit near the top, and the cap also bounds what _SCRAPE_CACHE holds
+EXA_SCRAPE_MAX_CHARS = 20000
+
 def scrape_listing_exa(url):
+    """(page text, image links) for a listing URL; cached for an hour."""
+    cached = _SCRAPE_CACHE.get(url)
+    if cached is not None:
+        return tuple(cached)  # JSON round-trips through Redis turn it into a list
+    result = _scrape_listing_uncached(url)
+    if result[0]:
+        _SCRAPE_CACHE.set(url, result)
+    return result
+
+def _scrape_listing_uncached(url):
     if not EXA_API_KEY:
         return scrape_listing_basic(url), []
     try:
-        resp = requests.post(EXA_URL, json={
-            "urls": [url], "text": True,
+        resp = HTTP2_CLIENT.post(EXA_URL, json={
+            "urls": [url], "text": {"maxCharacters": EXA_SCRAPE_MAX_CHARS},
             "extras": {"links": 3, "imageLinks": 5}
-        }, headers={"x-api-key": EXA_API_KEY, "Content-Type": "application/json"}, timeout=15)
+        }, headers=EXA_HEADERS, timeout=15)
         if resp.status_code == 200:
-            results = resp.json().get("results", [])
+            results = json_loads(resp.content).get("results", [])
             if results:
                 return results[0].get("text", ""), results[0].get("extras", {}).get("imageLinks", [])
     except Exception as e:
-        log.warning(f"Exa scrape failed: {e}")
+        log.warning("Exa scrape failed: %s", e)
     return scrape_listing_basic(url), []
 
+# Listing fields (and JSON-LD) sit well inside this; dealer pages can run to
+# megabytes of inline scripts we'd otherwise read, decode and regex-scan.
+SCRAPE_MAX_BYTES = 256 * 1024
+
 def scrape_listing_basic(url):
     try:
-        resp = requests.get(url, headers={"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"}, timeout=12, allow_redirects=True)
-        if resp.status_code == 200: return resp.text
+        with PAGE_SESSION.get(url, headers={"User-Agent": BROWSER_USER_AGENT}, timeout=12, allow_redirects=True, stream=True) as resp:
+            if resp.status_code == 200:
+                # iter_content yields decompressed bytes; requests already
+                # advertises gzip/deflate (and br when brotli is installed)
+                buf = bytearray()
+                for chunk in resp.iter_content(chunk_size=65536):
+                    buf += chunk
+                    if len(buf) >= SCRAPE_MAX_BYTES: break
+                del buf[SCRAPE_MAX_BYTES:]
+                return buf.decode(resp.encoding or "utf-8", errors="replace")
     except: pass
     return ""
 
+_PRICE_RE = _re.compile(r'\$(\d{1,3},?\d{3})')
+_MILE_RE = _re.compile(r'(?i)(\d{1,3},?\d{3})\s*(?:mi(?:les)?|mileage|odometer)')
+_VIN_TEXT_RE = _re.compile(r'(?i)(?:VIN|Stock)[:\s#]*([A-HJ-NPR-Z0-9]{17})')
+_DEALER_RE = _re.compile(r'"dealer(?:Name|_name)"\s*:\s*"([^"]+)"')
+_TITLE_RE = _re.compile(r'(?is)<title[^>]*>(.*?)</title>')
+_OG_TITLE_RE = _re.compile(r'(?i)<meta[^>]*property=["\'"]og:title["\'"][^>]*content=["\'"]([^"\'"]*)')
+_TITLE_YMM_RE = _re.compile(r'(20\d{2}|19\d{2})\s+([A-Za-z]+)\s+([A-Za-z0-9][A-Za-z0-9\- ]+?)(?:\s+[-|ÃÂ·Ã¢ÂÂ¢]|\s+for\s|\s+in\s|$)')
+_JSONLD_RE = _re.compile(r'(?is)<script[^>]*type=["\'"]application/ld\+json["\'"][^>]*>(.*?)</script>')
+_NAME_YMM_RE = _re.compile(r'(20\d{2}|19\d{2})\s+([A-Za-z]+)\s+(.*)')
+_MILE_VALUE_RE = _re.compile(r'([\d,]+)')
+_ITEMPROP_PRICE_RE = _re.compile(r'(?i)<[^>]*(?:itemprop=["\']price["\'][^>]*content=["\']([\d.,]+)|content=["\']([\d.,]+)["\'][^>]*itemprop=["\']price["\'])')
+_VEHICLE_TYPES = ("Vehicle", "Car", "Product", "Auto")
+
+def _jsonld_objects(text):
+    """Objects from the first 3 JSON-LD blocks, with top-level lists and
+    @graph containers flattened (dealer platforms emit both)."""
+    for jtext in _JSONLD_RE.findall(text)[:3]:
+        try: jd = json_loads(jtext)
+        except ValueError: continue
+        for item in (jd if isinstance(jd, list) else [jd]):
+            if not isinstance(item, dict): continue
+            graph = item.get("@graph")
+            if isinstance(graph, list):
+                yield from (g for g in graph if isinstance(g, dict))
+            else:
+                yield item
+
+def extract_vehicle_cached(text):
+    """extract_vehicle_from_text, memoized on a digest of the text."""
+    key = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+    info = _EXTRACT_CACHE.get(key)
+    if info is None:
+        info = extract_vehicle_from_text(text)
+        _EXTRACT_CACHE.set(key, info)
+    return dict(info)
+
 def extract_vehicle_from_text(text):
     """Extract vehicle info from HTML/text Ã¢ÂÂ price, mileage, VIN, and title-based YMM."""
     info = {}
     # Price
-    price_match = re.search(r'\$(\d{1,3},?\d{3})', text)
+    price_match = _PRICE_RE.search(text)
     if price_match: info["price"] = parse_price(price_match.group(0))
     # Mileage
-    mile_match = re.search(r'(\d{1,3},?\d{3})\s*(?:mi(?:les)?|mileage|odometer)', text, re.IGNORECASE)
+    mile_match = _MILE_RE.search(text)
     if mile_match: info["mileage"] = parse_mileage(mile_match.group(1))
     # VIN from text
-    vin_match = re.search(r'(?:VIN|Stock)[:\s#]*([A-HJ-NPR-Z0-9]{17})', text, re.IGNORECASE)
+    vin_match = _VIN_TEXT_RE.search(text)
     if vin_match: info["vin"] = vin_match.group(1).upper()
     # Dealer name from structured data
-    dealer_match = re.search(r'"dealer(?:Name|_name)"\s*:\s*"([^"]+)"', text)
+    dealer_match = _DEALER_RE.search(text)
     if dealer_match: info["dealer_name"] = dealer_match.group(1)
+    # Each markup pattern below needs a literal that a substring test on the
+    # lowered text rules out far cheaper than a regex walk; Exa hands back
+    # plain text, where none of them occur
+    lower = text.lower()
     # Title-based extraction (most reliable for YMM from HTML)
-    title = re.search(r'<title[^>]*>(.*?)</title>', text, re.IGNORECASE | re.DOTALL)
-    og = re.search(r'<meta[^>]*property=["\'"]og:title["\'"][^>]*content=["\'"]([^"\'"]*)', text, re.IGNORECASE)
+    title = _TITLE_RE.search(text) if "<title" in lower else None
+    og = _OG_TITLE_RE.search(text) if "og:title" in lower else None
     title_text = (og.group(1) if og else title.group(1) if title else "").strip()
     if title_text:
-        ymm = re.search(r'(20\d{2}|19\d{2})\s+([A-Za-z]+)\s+([A-Za-z0-9][A-Za-z0-9\- ]+?)(?:\s+[-|ÃÂ·Ã¢ÂÂ¢]|\s+for\s|\s+in\s|$)', title_text)
+        ymm = _TITLE_YMM_RE.search(title_text)
         if ymm:
             info["year"] = int(ymm.group(1))
             info["make"] = ymm.group(2).strip()
             info["model"] = ymm.group(3).strip()
+    # Microdata price is the listing's own markup, so it beats a bare "$" hit
+    if "itemprop" in lower:
+        ip = _ITEMPROP_PRICE_RE.search(text)
+        if ip:
+            price = parse_price(ip.group(1) or ip.group(2))
+            if price: info["price"] = price
     # JSON-LD structured data (best source)
-    jsonld_matches = re.findall(r'<script[^>]*type=["\'"]application/ld\+json["\'"][^>]*>(.*?)</script>', text, re.DOTALL | re.IGNORECASE)
-    for jtext in jsonld_matches[:3]:
+    for jd in (_jsonld_objects(text) if "ld+json" in lower else ()):
         try:
-            import json as jlib
-            jd = jlib.loads(jtext)
-            if isinstance(jd, list): jd = jd[0]
-            if jd.get("@type") in ["Vehicle", "Car", "Product", "Auto"]:
+            types = jd.get("@type")
+            if not isinstance(types, list): types = [types]
+            if any(t in _VEHICLE_TYPES for t in types):
                 if jd.get("vehicleIdentificationNumber"): info["vin"] = jd["vehicleIdentificationNumber"].upper()
                 if jd.get("name"):
-                    name_ymm = re.search(r'(20\d{2}|19\d{2})\s+([A-Za-z]+)\s+(.*)', jd["name"])
+                    name_ymm = _NAME_YMM_RE.search(jd["name"])
                     if name_ymm:
                         info["year"] = int(name_ymm.group(1))
                         info["make"] = name_ymm.group(2)
@@ -478,7 +946,7 @@ def extract_vehicle_from_text(text):
                 if jd.get("mileageFromOdometer"):
                     m = jd["mileageFromOdometer"]
                     if isinstance(m, dict): m = m.get("value", m.get("name", ""))
-                    mile_val = re.search(r'([\d,]+)', str(m))
+                    mile_val = _MILE_VALUE_RE.search(str(m))
                     if mile_val: info["mileage"] = parse_mileage(mile_val.group(1))
                 if jd.get("offers"):
                     offers = jd["offers"]
@@ -493,124 +961,127 @@ def extract_vehicle_from_text(text):
 # NHTSA VIN DECODE ÃÂÃÂ¢ÃÂÃÂÃÂÃÂ get exact specs
 # ==============================================================
 
-def decode_vin_nhtsa(vin):
-    """Decode VIN via NHTSA to get exact engine, displacement, drivetrain, etc."""
-    try:
-        resp = requests.get(f"{NHTSA_VIN_DECODE}/{vin}", params={"format": "json", "modelYear": ""}, timeout=10)
-        if resp.status_code == 200:
-            results = resp.json().get("Results", [])
-            if results:
-                r = results[0]
-                return {
-                    "engine_displacement": r.get("DisplacementL", ""),
-                    "engine_cylinders": r.get("EngineCylinders", ""),
-                    "engine_model": r.get("EngineModel", ""),
-                    "fuel_type": r.get("FuelTypePrimary", ""),
-                    "drive_type": r.get("DriveType", ""),
-                    "transmission": r.get("TransmissionStyle", ""),
-                    "body_class": r.get("BodyClass", ""),
-                    "plant_city": r.get("PlantCity", ""),
-                    "plant_country": r.get("PlantCountry", ""),
-                    "series": r.get("Series", ""),
-                    "trim": r.get("Trim", ""),
-                    "gvwr": r.get("GVWR", ""),
-                    "electrification": r.get("ElectrificationLevel", ""),
-                    "battery_type": r.get("BatteryType", ""),
-                    "ev_range": r.get("EVDriveUnit", ""),
-                }
-    except Exception as e:
-        log.warning(f"NHTSA VIN decode failed: {e}")
-    return None
+_VIN_SPEC_FIELDS = (("engine_displacement", "DisplacementL"), ("engine_cylinders", "EngineCylinders"),
+                    ("engine_model", "EngineModel"), ("fuel_type", "FuelTypePrimary"),
+                    ("drive_type", "DriveType"), ("transmission", "TransmissionStyle"),
+                    ("body_class", "BodyClass"), ("plant_city", "PlantCity"),
+                    ("plant_country", "PlantCountry"), ("series", "Series"), ("trim", "Trim"),
+                    ("gvwr", "GVWR"), ("electrification", "ElectrificationLevel"),
+                    ("battery_type", "BatteryType"), ("ev_range", "EVDriveUnit"))
+
+def vin_specs(row):
+    """Exact engine, displacement, drivetrain, etc. from a nhtsa_vin_decode row."""
+    if not row: return None
+    return {out: row.get(src, "") for out, src in _VIN_SPEC_FIELDS}
 
 
 # ==============================================================
 # AUTO.DEV ÃÂÃÂ¢ÃÂÃÂÃÂÃÂ VIN lookup + market comps
 # ==============================================================
 
+# Auto.dev listing fields kept from a VIN lookup (names as the API sends them)
+_AUTODEV_VIN_FIELDS = ("year", "make", "model", "trim", "price", "mileage",
+                       "dealerName", "dealerPhone", "dealerWebsite", "displayColor", "photoUrls",
+                       "bodyType", "engine", "transmission", "drivetrain", "fuelType",
+                       "mpgCity", "mpgHighway")
+
 def lookup_vin_autodev(vin):
     if not AUTODEV_API_KEY: return None
+    key = vin.upper()
+    cached = _VIN_CACHE.get(key)
+    if cached is not None: return cached
     try:
-        resp = requests.get(f"{AUTODEV_BASE}?vin={vin}", headers={
-            "Authorization": f"Bearer {AUTODEV_API_KEY}"
-        }, timeout=10)
+        resp = SESSION.get(f"{AUTODEV_BASE}?vin={vin}", headers=AUTODEV_HEADERS, timeout=10)
         if resp.status_code == 200:
-            records = resp.json().get("records", [])
+            records = json_loads(resp.content).get("records", [])
             if records:
                 r = records[0]
-                return {
-                    "year": r.get("year"), "make": r.get("make"), "model": r.get("model"),
-                    "trim": r.get("trim"), "price": parse_price(r.get("price")),
-                    "mileage": parse_mileage(r.get("mileage")),
-                    "dealerName": r.get("dealerName"), "dealerPhone": r.get("dealerPhone"),
-                    "dealerWebsite": r.get("dealerWebsite"),
-                    "displayColor": r.get("displayColor"), "photoUrls": r.get("photoUrls", []),
-                    "bodyType": r.get("bodyType"), "engine": r.get("engine"),
-                    "transmission": r.get("transmission"), "drivetrain": r.get("drivetrain"),
-                    "fuelType": r.get("fuelType"),
-                    "mpgCity": r.get("mpgCity"), "mpgHighway": r.get("mpgHighway"),
-                }
+                record = {k: r.get(k) for k in _AUTODEV_VIN_FIELDS}
+                record["price"] = parse_price(record["price"])
+                record["mileage"] = parse_mileage(record["mileage"])
+                record["photoUrls"] = r.get("photoUrls", [])
+                _VIN_CACHE.set(key, record)
+                return record
     except Exception as e:
-        log.warning(f"Auto.dev VIN lookup failed: {e}")
+        log.warning("Auto.dev VIN lookup failed: %s", e)
     return None
 
 
+def _fetch_market_listings(year, make, model, zip_code=None):
+    """Raw comp set for (year, make, model, zip), cached for _COMP_CACHE's TTL (6h). None on API failure."""
+    key = (year, str(make).lower(), str(model).lower(), zip_code)
+    cached = _COMP_CACHE.get(key)
+    if cached is not None: return cached
+    params = {"make": make, "model": model, "page_size": 50}
+    if year:
+        params["year_min"] = max(year - 1, 1990)
+        params["year_max"] = year + 1
+    if zip_code:
+        params["zip"] = zip_code
+        params["radius"] = 50
+    resp = SESSION.get(AUTODEV_BASE, params=params, headers=AUTODEV_HEADERS, timeout=10)
+    if resp.status_code != 200: return None
+    data = json_loads(resp.content)
+    records = data.get("records", [])
+    prices = []
+    mileage_prices = []
+    for r in records:
+        p = parse_price(r.get("price"))
+        m = parse_mileage(r.get("mileage"))
+        if p:
+            prices.append(p)
+            if m: mileage_prices.append({"price": p, "mileage": m})
+    prices.sort()
+    listings = {"prices": prices, "mileage_prices": mileage_prices,
+                "total": data.get("totalCount", len(records))}
+    _COMP_CACHE.set(key, listings)
+    return listings
+
+
 def get_market_comps(year, make, model, trim=None, zip_code=None, listing_price=None):
     if not AUTODEV_API_KEY: return None
     try:
-        params = {"make": make, "model": model, "page_size": 50}
-        if year:
-            params["year_min"] = max(year - 1, 1990)
-            params["year_max"] = year + 1
-        if zip_code:
-            params["zip"] = zip_code
-            params["radius"] = 50
-        resp = requests.get(AUTODEV_BASE, params=params, headers={
-            "Authorization": f"Bearer {AUTODEV_API_KEY}"
-        }, timeout=10)
-        if resp.status_code == 200:
-            data = resp.json()
-            records = data.get("records", [])
-            total = data.get("totalCount", len(records))
-            prices = []
-            mileage_prices = []
-            for r in records:
-                p = parse_price(r.get("price"))
-                m = parse_mileage(r.get("mileage"))
-                if p:
-                    prices.append(p)
-                    if m: mileage_prices.append({"price": p, "mileage": m})
+        listings = _fetch_market_listings(year, make, model, zip_code)
+        if listings:
+            prices = listings["prices"]
+            mileage_prices = listings["mileage_prices"]
+            total = listings["total"]
             if not prices: return None
-            prices.sort()
             avg_price = sum(prices) // len(prices)
-            median_price = int(statistics.median(prices))
+            mid = len(prices) // 2  # prices is sorted
+            median_price = prices[mid] if len(prices) % 2 else (prices[mid - 1] + prices[mid]) // 2
             min_price = prices[0]
             max_price = prices[-1]
             percentile = None; deal_score = None; savings = None
             if listing_price:
-                below = len([p for p in prices if p <= listing_price])
+                below = bisect.bisect_right(prices, listing_price)  # prices is sorted
                 percentile = round(below / len(prices) * 100)
                 deal_score = max(1, min(10, round(10 - (percentile / 10))))
                 savings = median_price - listing_price
             num_buckets = min(10, max(4, len(prices) // 2))
             bucket_size = max(500, (max_price - min_price) // num_buckets)
             if bucket_size == 0: bucket_size = 1000
-            buckets = []
-            current = min_price
-            while current < max_price + bucket_size:
-                count = len([p for p in prices if current <= p < current + bucket_size])
-                buckets.append({"min": current, "max": current + bucket_size, "count": count})
-                current += bucket_size
-                if len(buckets) > 15: break
+            # Buckets of bucket_size from min_price until one holds max_price
+            # (at most 16); each price's bucket is a direct index. Prices past
+            # the 16-bucket cap aren't counted, as before.
+            n_buckets = min(16, -(-(max_price - min_price) // bucket_size) + 1)
+            counts = [0] * n_buckets
+            for p in prices:
+                i = (p - min_price) // bucket_size
+                if i >= n_buckets: break  # prices is sorted
+                counts[i] += 1
+            buckets = [{"min": min_price + i * bucket_size, "max": min_price + (i + 1) * bucket_size, "count": c}
+                       for i, c in enumerate(counts)]
             return {
                 "avg_price": avg_price, "median_price": median_price,
                 "min_price": min_price, "max_price": max_price,
                 "percentile": percentile, "deal_score": deal_score, "savings": savings,
                 "comp_count": len(prices), "total_market": total,
-                "price_buckets": buckets, "prices_sample": prices[:30],
+                "price_buckets": buckets,
                 "mileage_prices": mileage_prices[:30]
             }
     except Exception as e:
-        log.warning(f"Market comp lookup failed: {e}")
+        log.warning("Market comp lookup failed: %s", e)
     return None
 
 
@@ -618,67 +1089,128 @@ def get_market_comps(year, make, model, trim=None, zip_code=None, listing_price=
 # NHTSA ÃÂÃÂ¢ÃÂÃÂÃÂÃÂ recalls + complaints
 # ==============================================================
 
-def get_nhtsa_data(year, make, model):
-    result = {
-        "recall_count": 0, "complaint_count": 0,
-        "recalls": [], "complaints_raw": [],
-        "top_complaint_areas": [],
-        "risk_score": 0, "risk_label": "Low Risk",
-    }
-    try:
-        resp = requests.get(NHTSA_RECALLS_URL, params={
-            "make": make, "model": model, "modelYear": year
-        }, timeout=10)
-        if resp.status_code == 200:
-            recalls = resp.json().get("results", [])
-            result["recall_count"] = len(recalls)
-            result["recalls"] = [{
-                "component": r.get("Component", "Unknown"),
-                "summary": r.get("Summary", ""),
-                "consequence": r.get("Consequence", ""),
-                "remedy": r.get("Remedy", "")
-            } for r in recalls[:10]]
-    except: pass
-    try:
-        resp = requests.get(NHTSA_COMPLAINTS, params={
-            "make": make, "model": model, "modelYear": year
-        }, timeout=10)
-        if resp.status_code == 200:
-            complaints = resp.json().get("results", [])
-            result["complaint_count"] = len(complaints)
-            result["complaints_raw"] = complaints[:20]
-            areas = {}
-            for c in complaints:
-                comp = c.get("components", "Unknown")
-                areas[comp] = areas.get(comp, 0) + 1
-            result["top_complaint_areas"] = sorted(areas.items(), key=lambda x: -x[1])[:8]
-    except: pass
-    # Risk score ÃÂÃÂ¢ÃÂÃÂÃÂÃÂ realistic calibration
-    cc = result["complaint_count"]
+# Complaint summaries that count toward the severity part of the risk score
+_SEVERE_RE = _re.compile(r'(?i)death|fatality|unintended acceleration|loss of steering')
+
+def _risk_score(cc, rc, severe_count):
+    """(score out of 10, label) from complaint/recall counts and the number
+    of severe complaints (death, fatality, ...) among the sampled ones."""
     if cc <= 20: complaint_pts = 0
     elif cc <= 50: complaint_pts = 0.5
     elif cc <= 100: complaint_pts = 1.0
     elif cc <= 200: complaint_pts = 1.5
     elif cc <= 500: complaint_pts = 2.5
     else: complaint_pts = 3.5
-    rc = result["recall_count"]
     if rc <= 2: recall_pts = 0
     elif rc <= 4: recall_pts = 0.5
     elif rc <= 6: recall_pts = 1.5
     else: recall_pts = 2.5
-    severe_keywords = ["death", "fatality", "unintended acceleration", "loss of steering"]
+    severity_pts = min(2, severe_count * 0.5)
+    score = round(min(10, max(0, complaint_pts + recall_pts + severity_pts)), 1)
+    if score <= 1.5: label = "Low Risk"
+    elif score <= 3: label = "Below Average Risk"
+    elif score <= 5: label = "Average"
+    elif score <= 7: label = "Above Average Risk"
+    else: label = "High Risk"
+    return score, label
+
+_NOT_MODIFIED = object()
+
+def _fetch_nhtsa_results(url, year, make, model, validator=None):
+    """(results, validator) for an api.nhtsa.gov recalls/complaints query.
+    results is None on failure or while NHTSA_BREAKER is open (only outages,
+    i.e. errors and 5xx, trip it), or _NOT_MODIFIED when the [ETag,
+    Last-Modified] validator from an earlier fetch still holds."""
+    headers = {}
+    if validator:
+        etag, last_modified = validator
+        if etag: headers["If-None-Match"] = etag
+        if last_modified: headers["If-Modified-Since"] = last_modified
+    if not NHTSA_BREAKER.allow(): return None, None
+    try:
+        resp = SESSION.get(url, params={
+            "make": make, "model": model, "modelYear": year
+        }, headers=headers, timeout=NHTSA_TIMEOUT)
+    except requests.RequestException:
+        NHTSA_BREAKER.failure()
+        return None, None
+    if resp.status_code >= 500:
+        NHTSA_BREAKER.failure()
+        return None, None
+    NHTSA_BREAKER.success()
+    if resp.status_code == 304 and validator:
+        return _NOT_MODIFIED, validator
+    if resp.status_code == 200:
+        etag, last_modified = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+        try: return json_loads(resp.content).get("results", []), ([etag, last_modified] if etag or last_modified else None)
+        except Exception: pass
+    return None, None
+
+def get_nhtsa_data(year, make, model):
+    key = (year, str(make).lower(), str(model).lower())
+    cached = _NHTSA_CACHE.get(key)
+    if cached is not None: return cached
+    result = {
+        "recall_count": 0, "complaint_count": 0,
+        "recalls": [], "complaints_raw": [],
+        "top_complaint_areas": [],
+        "risk_score": 0, "risk_label": "Low Risk",
+    }
+    # An expired record is revalidated with the ETag/Last-Modified NHTSA sent
+    # for it, and is the fallback if NHTSA is down
+    stale = _NHTSA_CACHE.get(key, allow_stale=True)
+    validators = (stale or {}).get("validators") or {}
+    # Recalls and complaints are independent endpoints -- fetch both at once.
+    # A private pool (not EXECUTOR) because this function itself runs on EXECUTOR.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as ex:
+        fut_recalls = ex.submit(_fetch_nhtsa_results, NHTSA_RECALLS_URL, year, make, model, validators.get("recalls"))
+        fut_complaints = ex.submit(_fetch_nhtsa_results, NHTSA_COMPLAINTS, year, make, model, validators.get("complaints"))
+        recalls, recalls_validator = fut_recalls.result()
+        complaints, complaints_validator = fut_complaints.result()
+    if recalls is _NOT_MODIFIED and complaints is _NOT_MODIFIED:
+        log.info("NHTSA data unchanged for %s %s %s", year, make, model)
+        _NHTSA_CACHE.set(key, stale)
+        return stale
+    # Only one side unchanged: its raw results weren't kept, so fetch it in full
+    if recalls is _NOT_MODIFIED:
+        recalls, recalls_validator = _fetch_nhtsa_results(NHTSA_RECALLS_URL, year, make, model)
+    if complaints is _NOT_MODIFIED:
+        complaints, complaints_validator = _fetch_nhtsa_results(NHTSA_COMPLAINTS, year, make, model)
+    if recalls is None or complaints is None:
+        # NHTSA is down or failing: an expired record beats a falsely clean one
+        if stale is not None:
+            log.info("Serving stale NHTSA data for %s %s %s", year, make, model)
+            return {**stale, "degraded": True}
+        result["degraded"] = True
+    if recalls is not None:
+        result["recall_count"] = len(recalls)
+        result["recalls"] = [{
+            "component": r.get("Component", "Unknown"),
+            "summary": r.get("Summary", ""),
+            "consequence": r.get("Consequence", ""),
+            "remedy": r.get("Remedy", "")
+        } for r in recalls[:10]]
+    if complaints is not None:
+        result["complaint_count"] = len(complaints)
+        # Only the fields the severity scan and the history prompt read; the
+        # record is cached (and shared through Redis) for a week
+        result["complaints_raw"] = [{"components": c.get("components", ""), "summary": c.get("summary", "")}
+                                    for c in complaints[:20]]
+        areas = Counter(c.get("components", "Unknown") for c in complaints)
+        result["top_complaint_areas"] = areas.most_common(8)
     severe_count = 0
     for c in result.get("complaints_raw", []):
-        text = str(c.get("summary", "")).lower()
-        if any(kw in text for kw in severe_keywords): severe_count += 1
-    severity_pts = min(2, severe_count * 0.5)
-    raw = complaint_pts + recall_pts + severity_pts
-    result["risk_score"] = round(min(10, max(0, raw)), 1)
-    if result["risk_score"] <= 1.5: result["risk_label"] = "Low Risk"
-    elif result["risk_score"] <= 3: result["risk_label"] = "Below Average Risk"
-    elif result["risk_score"] <= 5: result["risk_label"] = "Average"
-    elif result["risk_score"] <= 7: result["risk_label"] = "Above Average Risk"
-    else: result["risk_label"] = "High Risk"
+        if _SEVERE_RE.search(str(c.get("summary", ""))):
+            severe_count += 1
+            if severe_count >= 4: break  # severity_pts is capped at 2
+    result["risk_score"], result["risk_label"] = _risk_score(
+        result["complaint_count"], result["recall_count"], severe_count)
+    # Only cache complete data -- a failed endpoint would otherwise pin a
+    # falsely clean record for the week _NHTSA_CACHE keeps it
+    if recalls is not None and complaints is not None:
+        if recalls_validator or complaints_validator:
+            result["validators"] = {"recalls": recalls_validator, "complaints": complaints_validator}
+        _NHTSA_CACHE.set(key, result)
     return result
 
 
@@ -688,20 +1220,25 @@ def get_nhtsa_data(year, make, model):
 
 def get_dealer_reputation(dealer_name, dealer_location=None):
     if not EXA_API_KEY or not dealer_name: return None
+    key = (dealer_name.lower(), dealer_location)
+    cached = _DEALER_CACHE.get(key)
+    if cached is not None: return cached
     try:
         query = f'"{dealer_name}" reviews rating'
         if dealer_location: query += f" {dealer_location}"
-        resp = requests.post(EXA_SEARCH_URL, json={
+        resp = HTTP2_CLIENT.post(EXA_SEARCH_URL, json={
             "query": query, "numResults": 5, "type": "keyword",
             "contents": {"text": {"maxCharacters": 2000}}
-        }, headers={"x-api-key": EXA_API_KEY, "Content-Type": "application/json"}, timeout=15)
+        }, headers=EXA_HEADERS, timeout=15)
         if resp.status_code == 200:
-            results = resp.json().get("results", [])
+            results = json_loads(resp.content).get("results", [])
             review_texts = [r.get("text", "")[:500] for r in results if r.get("text")]
             if review_texts:
-                return {"raw_reviews": review_texts, "source_count": len(review_texts)}
+                rep = {"raw_reviews": review_texts, "source_count": len(review_texts)}
+                _DEALER_CACHE.set(key, rep)
+                return rep
     except Exception as e:
-        log.warning(f"Dealer reputation scrape failed: {e}")
+        log.warning("Dealer reputation scrape failed: %s", e)
     return None
 
 
@@ -709,422 +1246,144 @@ def get_dealer_reputation(dealer_name, dealer_location=None):
 # WEB RESEARCH ÃÂÃÂ¢ÃÂÃÂÃÂÃÂ Exa search for model-specific intelligence
 # ==============================================================
 
-def research_model_year(year, make, model, trim=None):
-    """Targeted research: What's special about this model year / generation?"""
-    if not EXA_API_KEY: return None
+# Every Exa research search of every in-flight analysis runs here; the
+# searches are leaf calls (nothing waits on this pool from inside it), so a
+# fixed size bounds the research threads per process however many requests
+# are running.
+RESEARCH_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=16)
+
+def model_year_queries(year, make, model, trim=None):
+    """Targeted research: What's special about this model year / generation?
+    Returns (queries, max_chars per result)."""
     vehicle_str = f"{year} {make} {model}"
     if trim: vehicle_str += f" {trim}"
     queries = [
         f"{vehicle_str} generation changes what's new specs review",
         f"{year} {make} {model} vs previous year changes improvements",
     ]
-    return _exa_multi_search(queries, max_results=3, max_chars=1500)
+    return queries, 1500
 
 
-def research_owner_feedback(year, make, model, trim=None):
+def owner_feedback_queries(year, make, model, trim=None):
     """Targeted research: Real owner experiences from forums and Reddit."""
-    if not EXA_API_KEY: return None
     vehicle_str = f"{year} {make} {model}"
     queries = [
         f"site:reddit.com {vehicle_str} owner review experience",
         f"{vehicle_str} forum owner long term review what I wish I knew",
         f"{vehicle_str} real owner complaints pros cons daily driving",
     ]
-    results = _exa_multi_search(queries, max_results=3, max_chars=2000)
-    if results:
-        # Tag each result with its source URL for citation
-        return results
-    return None
+    return queries, 2000
 
 
-def research_dealer_questions(year, make, model, trim=None):
+def dealer_questions_queries(year, make, model, trim=None):
     """Targeted research: Known issues to ask about for THIS car."""
-    if not EXA_API_KEY: return None
     vehicle_str = f"{year} {make} {model}"
     queries = [
         f"{vehicle_str} buying guide what to check inspection tips",
         f"{vehicle_str} common problems to look for before buying",
     ]
-    return _exa_multi_search(queries, max_results=3, max_chars=1500)
+    return queries, 1500
 
 
-def _exa_multi_search(queries, max_results=3, max_chars=1500):
-    """Execute multiple Exa searches and combine results with source URLs."""
+def _exa_search(query, max_results, max_chars):
+    """Result list of one Exa search; [] on failure."""
+    try:
+        resp = HTTP2_CLIENT.post(EXA_SEARCH_URL, json={
+            "query": query, "numResults": max_results, "type": "auto",
+            "contents": {"text": {"maxCharacters": max_chars}}
+        }, headers=EXA_HEADERS, timeout=12)
+        if resp.status_code == 200:
+            return json_loads(resp.content).get("results", [])
+    except Exception as e:
+        log.warning("Exa search failed for '%s': %s", query[:50], e)
+    return []
+
+def _merge_exa_results(batches, max_chars):
+    """Combine per-query result lists, in query order, into one text block
+    with source URLs. A page returned by more than one query is only
+    included once."""
     all_results = []
-    for q in queries:
-        try:
-            resp = requests.post(EXA_SEARCH_URL, json={
-                "query": q, "numResults": max_results, "type": "auto",
-                "contents": {"text": {"maxCharacters": max_chars}}
-            }, headers={"x-api-key": EXA_API_KEY, "Content-Type": "application/json"}, timeout=12)
-            if resp.status_code == 200:
-                for r in resp.json().get("results", []):
-                    txt = r.get("text", "")
-                    url = r.get("url", "")
-                    title = r.get("title", "")
-                    if txt:
-                        source_tag = f"[Source: {title} - {url}]" if url else ""
-                        all_results.append(f"{source_tag}\n{txt[:max_chars]}")
-        except Exception as e:
-            log.warning(f"Exa search failed for '{q[:50]}': {e}")
+    seen_urls = set()
+    for batch in batches:
+        for r in batch:
+            txt = r.get("text", "")
+            url = r.get("url", "")
+            title = r.get("title", "")
+            if url in seen_urls: continue
+            if url: seen_urls.add(url)
+            if txt:
+                source_tag = f"[Source: {title} - {url}]" if url else ""
+                all_results.append(f"{source_tag}\n{txt[:max_chars]}")
     if all_results:
         return "\n---\n".join(all_results[:8])
     return None
 
 
-# ==============================================================
-# SECTION GENERATORS (v9.1 Pipeline) 
-# Each section gets a focused mini-prompt with ONLY its relevant data
-# ==============================================================
-
-SECTION_PROMPTS = {
-    "model_year_summary": """You are a car expert writing one section of a buyer report.
-
-SECTION: "Know Your Car" â Model Year Summary
-VEHICLE: {vehicle_str}
-
-TASK: Write a concise summary of what makes this model year special. What generation is it? 
-What changed vs previous year? Key highlights (engine, tech, safety, design). Include a fun fact.
-
-{data_context}
-
-OUTPUT FORMAT (JSON):
-{{
-  "headline": "<one punchy line about this model year>",
-  "generation": "<which generation â e.g., '4th Generation (2016-2023)'>",
-  "what_changed_this_year": "<specific changes for this model year>",
-  "highlights": ["<highlight 1>", "<highlight 2>", "<highlight 3>"],
-  "engine_and_drivetrain": "<1-2 sentences about powertrain>",
-  "fun_fact": "<one interesting thing most people don't know>"
-}}
-
-RULES:
-- ONLY use information from the research data above
-- If research data is thin, focus on what you DO know from the data
-- Name the specific car in every response
-- No generic filler""",
-
-    "vehicle_history": """You are a car expert writing one section of a buyer report.
-
-SECTION: "The History" â Vehicle Safety & Recall Data  
-VEHICLE: {vehicle_str}
-
-TASK: Summarize the NHTSA recall and complaint data for this model year. Frame recalls as 
-FREE manufacturer fixes (positive framing). Be factual and helpful, not scary.
-
-{data_context}
-
-OUTPUT FORMAT (JSON):
-{{
-  "headline": "<one line â e.g., 'Clean model year with 2 recalls â both are free dealer fixes'>",
-  "recalls_for_model_year": <integer>,
-  "recall_details": ["<brief description of each recall + that it's a free fix>"],
-  "complaints_for_model_year": <integer>,
-  "common_complaint_areas": "<factual summary of top categories if any>",
-  "carfax_tip": "<specific advice about what to look for on Carfax for THIS car>",
-  "nhtsa_source": "NHTSA data for {year} {make} {model} model year â check this specific VIN at nhtsa.gov/recalls"
-}}
-
-RULES:
-- If 0 recalls, say that clearly as a positive
-- If 0 complaints, say that clearly as a positive
-- Frame recalls as free fixes, not scary defects
-- ONLY cite data provided â do NOT invent recalls or complaints
-- NHTSA data is for the MODEL YEAR, not this specific VIN â say that""",
-
-    "price_analysis": """You are a car market analyst writing one section of a buyer report.
-
-SECTION: "The Price" â Market Comparison
-VEHICLE: {vehicle_str}
-
-TASK: Analyze this car's price vs local market comps within 50 miles. Is it a good deal? 
-Use the actual numbers provided. Give a verdict and explain WHY.
-
-{data_context}
-
-OUTPUT FORMAT (JSON):
-{{
-  "verdict": "<Great Deal|Good Deal|Fair Price|Slightly Above Market>",
-  "vs_market": "<exact comparison â e.g., '$1,290 above the $12,145 median of 6 local comps'>",
-  "comp_count": "<number of comparable listings within 50 miles>",
-  "price_range": "<local price range â e.g., '$9,295 - $14,995'>",
-  "fair_range": "<what you'd expect to pay â e.g., '$11,500 - $13,500'>",
-  "context": "<2-3 sentences explaining WHY â trim, mileage, condition vs comps. Cite numbers.>",
-  "bottom_line": "<one decisive sentence>"
-}}
-
-RULES:
-- ONLY use the market data numbers provided
-- If no comp data, say "No comparable listings found within 50 miles" 
-- Cite exact numbers from the data â never approximate when you have real figures
-- Be helpful â if it's above market, explain what might justify it""",
-
-    "owner_feedback": """You are a car expert writing one section of a buyer report.
-
-SECTION: "Owner Talk" â What Real Owners Say
-VEHICLE: {vehicle_str}
-
-TASK: Summarize what real owners say about this car based ONLY on the web research data below.
-
-{data_context}
-
-OUTPUT FORMAT (JSON):
-{{
-  "headline": "<one line from REAL research â cite source if possible>",
-  "what_owners_love": ["<from research data>", "<from research data>"],
-  "what_owners_wish_they_knew": ["<from research data â cite source>"],
-  "common_experiences": "<2-3 sentences from real owner perspectives>",
-  "reliability_reputation": "<one sentence on reliability reputation>"
-}}
-
-CRITICAL RULES:
-- ONLY use the web research data provided below
-- Cite sources: "Owners on PriusChat report..." or "Reddit users mention..."
-- If the research data is empty or doesn't contain owner experiences, return:
-  {{
-    "headline": "Limited owner data found â check Reddit and forums for real experiences",
-    "what_owners_love": ["Research data was limited for this specific model â check r/{make_lower} and model-specific forums"],
-    "what_owners_wish_they_knew": ["No specific owner insights found in research"],
-    "common_experiences": "Limited owner-specific feedback available in our research. For real owner experiences, check Reddit r/{make_lower}, model-specific forums, and long-term review videos on YouTube.",
-    "reliability_reputation": "Check Consumer Reports and J.D. Power for official reliability ratings for the {year} {make} {model}."
-  }}
-- BANNED: "Some owners wish they knew about regular maintenance" â that's generic filler
-- BANNED: "It's important to stay up to date on recalls" â obvious and unhelpful  
-- Every bullet MUST come from the research data or honestly say "not found"
-- NO FABRICATED OWNER SENTIMENT""",
-
-    "dealer_questions": """You are a car buying expert writing one section of a buyer report.
-
-SECTION: "Go Prepared" â Smart Questions for the Dealer
-VEHICLE: {vehicle_str}
-MILEAGE: {mileage}
-PRICE: {price}
-
-TASK: Generate 5-7 smart, specific questions a buyer should ask about THIS specific car.
-Use the vehicle data, NHTSA data, and research to craft questions that show homework.
-
-{data_context}
-
-OUTPUT FORMAT (JSON):
-{{
-  "questions": [
-    {{
-      "ask": "<the exact question â specific to THIS car>",
-      "why_it_matters": "<what the answer tells you>",
-      "good_answer": "<what you want to hear>"
-    }}
-  ],
-  "bonus_tip": "<one insider tip about buying THIS type of car>"
-}}
-
-CRITICAL MILEAGE RULE:
-This car has {mileage}. ALL questions MUST be appropriate for that mileage.
-- Under 1,000 miles = essentially NEW. Ask about warranty coverage, break-in period, dealer incentives, why it's still on the lot. Do NOT ask about timing belts, transmission flushes, brake wear, or any high-mileage maintenance.
-- 1,000-30,000 miles = low mileage. Ask about remaining factory warranty, first-owner history, any open recalls.
-- 30,000-100,000 miles = moderate. Ask about major service milestones completed (30k/60k/90k service).
-- Over 100,000 miles = high mileage. Ask about timing belt/chain service, transmission service, major repairs done.
-
-RULES:
-- Questions MUST reference this specific {year} {make} {model}
-- Questions MUST match the ACTUAL mileage of {mileage} â do NOT generate questions for a different mileage
-- If NHTSA recalls exist in the data, include a question about whether they've been addressed
-- BANNED: "Can I see the Carfax?" â too generic
-- BANNED: "Has this car been in any accidents?" â too generic
-- BANNED: Any question about high-mileage maintenance on a car with under 10,000 miles
-- Each question should show the buyer did their homework"""
-}
-
-
-# ==============================================================
-# AI SYSTEM PROMPT v4 ÃÂÃÂ¢ÃÂÃÂÃÂÃÂ IDENTITY-ANCHORED INTELLIGENCE
-# ==============================================================
-# The key insight: instead of one massive prompt that says "be specific",
-# we build a VEHICLE IDENTITY CARD that the model must reference in every answer.
-# Then we use a two-pass approach: research context first, then generate.
-
-
-ANALYSIS_SYSTEM_PROMPT = """You are AskCarBuddy â an AI car buying assistant built by someone with 20 years of dealership experience.
-
-YOUR JOB: The buyer found a car they WANT. Help them walk in confident and informed. You are their knowledgeable friend who did the research for them.
-
-TONE: Warm, positive, informative. Think "car-savvy friend texting you what they found" â not a legal document or consumer report. You LIKE cars. You want them to enjoy this purchase.
-
-====================================================================
-ABSOLUTE RULE #0 â NO FAKE DATA â OVERRIDES EVERYTHING
-====================================================================
-
-DO NOT FABRICATE DATA. If the provided context does not contain a specific number, stat, date, recall ID, complaint count â DO NOT INVENT IT.
-
-- Data from context below: cite confidently
-- General automotive knowledge: label as "generally" or "typically"
-- Specific stats you're making up: BANNED. NEVER DO THIS.
-
-====================================================================
-RULE #1 â THIS CAR ONLY
-====================================================================
-
-EVERY sentence must be about THIS specific car â the {year} {make} {model}. 
-If you catch yourself writing generic advice that applies to all cars, DELETE IT.
-
-â BANNED phrases: "It's important to...", "In general...", "Make sure to always...", "Vehicles like this..."
-â REQUIRED: Name this car, its generation, its engine, or its specific components in every paragraph.
-
-====================================================================
-THE 5 SECTIONS â WHAT EACH ONE DOES
-====================================================================
-
-SECTION 1: "Know Your Car" (model_year_summary)
-Help the buyer understand what they're looking at. What generation is this? What changed this year? What's the engine/drivetrain story? What are the highlights that make this model year special? Think of it as the "Wikipedia summary meets enthusiast review" â condensed into something useful. If you have web research data, USE IT to provide real generation-specific info.
-
-SECTION 2: "The History" (vehicle_history)
-Use any available data: NHTSA recalls for this model year, complaint data, known TSBs. Frame recalls as "these exist for the model year â check if this VIN is affected at nhtsa.gov/recalls." Mention Carfax as something the buyer should ask for. This section should make the buyer feel informed, not scared.
-
-SECTION 3: "The Price" (price_analysis)
-Use the market comparison data provided. How many comparable cars exist within 50 miles? Where does THIS car sit vs the median? Is it a good deal, fair deal, or slightly high? CITE THE ACTUAL NUMBERS. If this car is above median, explain WHY (lower miles, better trim, etc.). If below, say what a win that is. Give them a fair price range based on actual local comps.
-
-SECTION 4: "Owner Talk" (owner_feedback)
-What do real owners of this generation say? ONLY use information from the web research data provided. If the web research contains actual owner experiences, forum posts, Reddit threads, or review quotes â use those. Be specific: "Owners on PriusChat report..." or "Reddit users mention..."
-
-CRITICAL: Do NOT fabricate generic owner wisdom. Statements like "some owners wish they knew about regular maintenance" or "others wish they knew about recall notices" are BANNED â that's filler, not research. Every bullet point must come from an actual source in the web research data. If the web research doesn't contain owner feedback, write: "Limited owner-specific feedback found in research â check Reddit r/[make] and model-specific forums for real owner experiences."
-
-SECTION 5: "Go Prepared" (dealer_questions)
-Give them 5-7 smart, specific questions to ask the dealer about THIS car. Not generic "can I see the Carfax" stuff. Questions that show they did their homework and will get them useful information. For each question, explain what the answer tells them.
-
-====================================================================
-QUALITY RULES
-====================================================================
-
-1. If you can Google it in 5 seconds, don't include it
-2. Every question must be specific to this year/make/model
-3. No scare tactics â this is about helping them buy smart, not scaring them away
-4. Cite actual numbers from the data provided â don't round or approximate when you have exact figures
-5. Keep it concise â buyers want quick intel, not essays
-6. Owner Feedback MUST come from web research data â NEVER generate generic owner wisdom from your training data. If research doesn't include owner experiences, say so honestly. "Some owners wish they knew about regular maintenance" is BANNED â that's filler, not intel.
-"""
-
-
-
-# ==============================================================
-# AI ANALYSIS SCHEMA
-# ==============================================================
-
-
-ANALYSIS_JSON_SCHEMA = """{
-  "overall_score": {
-    "score": <0.0-10.0 with one decimal â buying confidence score>,
-    "label": "<Strong Buy|Buy|Lean Buy|Neutral|Lean Pass>",
-    "one_liner": "<one decisive sentence naming the car â e.g., 'Clean 2017 Prius with solid service history at a fair local price â smart buy for a commuter'>"
-  },
-  "model_year_summary": {
-    "headline": "<one punchy line â e.g., 'The 4th-gen Prius brought a complete redesign with 10% better fuel economy'>",
-    "generation": "<which generation this is â e.g., '4th Generation (2016-2023)'>",
-    "what_changed_this_year": "<what Toyota/Honda/etc changed for this model year vs previous â be specific>",
-    "highlights": [
-      "<specific highlight of this model year â engine, tech, safety, design>",
-      "<another highlight>",
-      "<another highlight>"
-    ],
-    "engine_and_drivetrain": "<1-2 sentences about the powertrain â what it is, how it performs, reliability reputation>",
-    "fun_fact": "<one interesting thing about this generation that most people don't know>"
-  },
-  "vehicle_history": {
-    "headline": "<one line summary â e.g., 'Clean model year with 2 recalls on record â both are free dealer fixes'>",
-    "recalls_for_model_year": <integer count from NHTSA data>,
-    "recall_details": ["<if recalls exist: brief description of each â what it is + that it's a free fix>"],
-    "complaints_for_model_year": <integer count from NHTSA data>,
-    "common_complaint_areas": "<if complaints exist: factual summary of top categories>",
-    "carfax_tip": "<specific advice about what to look for on the Carfax for THIS car â e.g., 'For a 2017 Prius at 150K, you want to see consistent hybrid system service intervals. Ask for the Carfax and look for battery health checks after 100K.'>",
-    "nhtsa_source": "<Always: 'NHTSA data for [year] [make] [model] model year â check this specific VIN at nhtsa.gov/recalls'>"
-  },
-  "price_analysis": {
-    "verdict": "<Great Deal|Good Deal|Fair Price|Slightly Above Market>",
-    "vs_market": "<exact comparison â e.g., '$1,290 above the $12,145 median of 6 local comps'>",
-    "comp_count": "<number of comparable listings within 50 miles>",
-    "price_range": "<local price range â e.g., '$9,295 - $14,995'>",
-    "fair_range": "<what you'd expect to pay â e.g., '$11,500 - $13,500'>",
-    "context": "<2-3 sentences explaining WHY this car is priced where it is â trim, mileage, condition vs local comps. Use actual numbers.>",
-    "bottom_line": "<one sentence final take â e.g., 'Slightly above median but justified by lower mileage and nav package. Fair price for what you're getting.'>"
-  },
-  "owner_feedback": {
-    "headline": "<one line from REAL research â e.g., 'Reddit owners love the 50+ MPG but warn about road noise on highways'>",
-    "what_owners_love": [
-      "<specific thing owners rave about â from forums/reviews/web research>",
-      "<another thing>",
-      "<another thing>"
-    ],
-    "what_owners_wish_they_knew": [
-      "<MUST be from actual web research â e.g., 'PriusChat users say the 12V battery dies without warning around year 5' â NO generic advice like 'regular maintenance is important'>",
-      "<another specific thing from research â or omit this array if no real owner insights found>"
-    ],
-    "common_experiences": "<2-3 sentences about what daily ownership is actually like â from real owner perspectives>",
-    "reliability_reputation": "<one sentence on how this generation is regarded for reliability>"
-  },
-  "dealer_questions": {
-    "questions": [
-      {
-        "ask": "<the exact question to ask â specific to THIS car>",
-        "why_it_matters": "<what the answer tells you about the car>",
-        "good_answer": "<what you want to hear>"
-      }
-    ],
-    "bonus_tip": "<one insider tip about the buying process for THIS car â e.g., 'Toyota CPO warranty on a Prius covers the hybrid battery for an extra 12 months â ask if this qualifies'>"
-  }
-}"""
-
-
-
 # ==============================================================
 # AI ANALYSIS GENERATOR v4 ÃÂÃÂ¢ÃÂÃÂÃÂÃÂ Identity-anchored, two-context
 # ==============================================================
 
+# Identity card rows as (label, key, format), in print order
+_IDENTITY_ROWS = (
+    ("VIN", "vin", "{}"),
+    ("LISTED PRICE", "price", "${:,}"),
+    ("MILEAGE", "mileage", "{:,} miles"),
+    ("COLOR", "color", "{}"),
+    ("DEALER", "dealer_name", "{}"),
+    ("PHONE", "dealer_phone", "{}"),
+    ("LOCATION", "zip", "ZIP {}"),
+)
+_DECODED_SPEC_ROWS = (
+    ("  Displacement", "engine_displacement", "{}L"),
+    ("  Cylinders", "engine_cylinders", "{}"),
+    ("  Engine Code", "engine_model", "{}"),
+    ("  Fuel", "fuel_type", "{}"),
+    ("  Electrification", "electrification", "{}"),
+    ("  Battery", "battery_type", "{}"),
+)
+_LISTING_SPEC_ROWS = (
+    ("  Transmission", "transmission", "{}"),
+    ("  Drivetrain", "drivetrain", "{}"),
+    ("  Fuel Type", "fuelType", "{}"),
+)
+
+def _append_rows(lines, src, rows):
+    get = src.get
+    for label, key, fmt in rows:
+        val = get(key)
+        if not val: continue
+        try: text = fmt.format(val)
+        except ValueError: text = str(val)  # e.g. an unparsed "Call for price"
+        lines.append(f"{label}: {text}")
+
 def build_vehicle_identity(vehicle_info, vin_decode=None):
     """Build a structured identity card that forces the AI to reference this specific car."""
     v = vehicle_info
-    lines = []
-    lines.append("=" * 50)
-    lines.append("VEHICLE IDENTITY CARD ÃÂÃÂ¢ÃÂÃÂÃÂÃÂ Reference this in EVERY answer")
-    lines.append("=" * 50)
-
-    year = v.get('year', '?')
-    make = v.get('make', '?')
-    model = v.get('model', '?')
-    trim = v.get('trim', '')
-
-    lines.append(f"VEHICLE: {year} {make} {model} {trim}".strip())
-    if v.get("vin"): lines.append(f"VIN: {v['vin']}")
-    if v.get("price"): lines.append(f"LISTED PRICE: ${v['price']:,}")
-    if v.get("mileage"): lines.append(f"MILEAGE: {v['mileage']:,} miles")
-    if v.get("color"): lines.append(f"COLOR: {v['color']}")
-    if v.get("dealer_name"): lines.append(f"DEALER: {v['dealer_name']}")
-    if v.get("dealer_phone"): lines.append(f"PHONE: {v['dealer_phone']}")
-    if v.get("zip"): lines.append(f"LOCATION: ZIP {v['zip']}")
+    vd = vin_decode or {}
+    rule = "=" * 50
+    lines = [rule, "VEHICLE IDENTITY CARD ÃÂÃÂ¢ÃÂÃÂÃÂÃÂ Reference this in EVERY answer", rule,
+             f"VEHICLE: {v.get('year', '?')} {v.get('make', '?')} {v.get('model', '?')} {v.get('trim', '')}".strip()]
+    _append_rows(lines, v, _IDENTITY_ROWS)
 
     lines.append("")
     lines.append("POWERTRAIN SPECS:")
     if v.get("engine"): lines.append(f"  Engine: {v['engine']}")
-    if vin_decode:
-        vd = vin_decode
-        if vd.get("engine_displacement"): lines.append(f"  Displacement: {vd['engine_displacement']}L")
-        if vd.get("engine_cylinders"): lines.append(f"  Cylinders: {vd['engine_cylinders']}")
-        if vd.get("engine_model"): lines.append(f"  Engine Code: {vd['engine_model']}")
-        if vd.get("fuel_type"): lines.append(f"  Fuel: {vd['fuel_type']}")
-        if vd.get("electrification"): lines.append(f"  Electrification: {vd['electrification']}")
-        if vd.get("battery_type"): lines.append(f"  Battery: {vd['battery_type']}")
-    if v.get("transmission"): lines.append(f"  Transmission: {v['transmission']}")
-    if v.get("drivetrain"): lines.append(f"  Drivetrain: {v['drivetrain']}")
-    if v.get("fuelType"): lines.append(f"  Fuel Type: {v['fuelType']}")
+    _append_rows(lines, vd, _DECODED_SPEC_ROWS)
+    _append_rows(lines, v, _LISTING_SPEC_ROWS)
     if v.get("mpgCity") and v.get("mpgHighway"):
         lines.append(f"  MPG: {v['mpgCity']} city / {v['mpgHighway']} hwy")
     if v.get("bodyType"): lines.append(f"  Body: {v['bodyType']}")
+    if vd.get("plant_country"): lines.append(f"  Built in: {vd.get('plant_city', '')} {vd['plant_country']}")
 
-    if vin_decode:
-        vd = vin_decode
-        if vd.get("plant_country"): lines.append(f"  Built in: {vd.get('plant_city', '')} {vd['plant_country']}")
-
-    lines.append("=" * 50)
+    lines.append(rule)
     return "\n".join(lines)
 
 
+# ==============================================================
+# SECTION GENERATORS (v9.1 Pipeline) 
+# Each section gets a focused mini-prompt with ONLY its relevant data
+# ==============================================================
+
 SECTION_PROMPTS = {
     "model_year_summary": """You are a car expert writing one section of a buyer report.
 
@@ -1283,56 +1542,130 @@ RULES:
 }
 
 
-def generate_section(section_name, vehicle_info, data_context_str):
-    """Generate a single section using a focused mini-prompt."""
+# Groq request bodies only differ in the user prompt, so the fixed envelope
+# is serialized once and the encoded prompt is spliced into its slot per call.
+_GROQ_PROMPT_SLOT = b'"__PROMPT__"'
+# The largest section (7 dealer questions x 3 fields) is well under 1k
+# tokens; the cap only bounds runaway output, and Groq counts it against TPM
+SECTION_MAX_TOKENS = 1500
+
+def _groq_body_template(system, temperature, max_tokens):
+    return json_dumps({
+        "model": GROQ_MODEL,
+        "messages": [
+            {"role": "system", "content": system},
+            {"role": "user", "content": "__PROMPT__"}
+        ],
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "response_format": {"type": "json_object"}
+    })
+
+_SECTION_BODY = _groq_body_template("You are a car buying expert. Return ONLY valid JSON matching the requested schema. No markdown, no explanation â just the JSON object.", 0.15, SECTION_MAX_TOKENS)
+_SCORE_BODY = _groq_body_template("Return ONLY valid JSON. No explanation.", 0.1, 500)
+# Namespace for _GROQ_CACHE keys: the user prompt is hashed per call, but the
+# model, system prompts and sampling settings live in the body templates. A
+# change to any of them (or a new report version) must not serve old output
+# from Redis after a deploy.
+_GROQ_CACHE_NS = hashlib.blake2b(b"9.1.0\x00" + _SECTION_BODY + b"\x00" + _SCORE_BODY, digest_size=8).hexdigest()
+
+# Keys the frontend renders for each section; a reply missing any of them is
+# retried once with a stricter reminder, like unparseable JSON. A reply that
+# is still incomplete is used as-is (partial beats empty) but not cached.
+SECTION_REQUIRED_KEYS = {
+    "model_year_summary": ("headline", "generation", "highlights"),
+    "vehicle_history": ("headline", "recalls_for_model_year", "complaints_for_model_year"),
+    "price_analysis": ("verdict", "vs_market", "bottom_line"),
+    "owner_feedback": ("headline", "what_owners_love", "what_owners_wish_they_knew"),
+    "dealer_questions": ("questions",),
+    "overall_score": ("score", "label", "one_liner"),
+}
+_STRICT_SUFFIX = "\n\nYour previous reply was not valid. Return ONLY the JSON object with every key from OUTPUT FORMAT."
+
+def _missing_keys(section_name, data):
+    if not isinstance(data, dict):
+        return ["<object>"]
+    return [k for k in SECTION_REQUIRED_KEYS.get(section_name, ()) if k not in data]
+
+def groq_json(body_template, section_name, prompt, timeout):
+    """POST to Groq and decode the JSON reply, retrying once on a malformed one.
+    Returns None on HTTP errors or when neither reply parses."""
+    data = None
+    for attempt in (0, 1):
+        resp = groq_post(body_template, prompt if attempt == 0 else prompt + _STRICT_SUFFIX, timeout)
+        if resp.status_code != 200:
+            log.error("Section %s LLM error: %s - %s", section_name, resp.status_code, resp.text[:200])
+            return None
+        reply = json_loads(resp.content)
+        choice = reply["choices"][0]
+        if choice.get("finish_reason") == "length":
+            # The cap comes from body_template (section vs score body)
+            log.warning("Section %s hit its max_tokens cap (finish_reason=length, %s completion tokens)",
+                        section_name, (reply.get("usage") or {}).get("completion_tokens", "?"))
+        try:
+            parsed = json_loads(choice["message"]["content"])
+        except ValueError as e:
+            log.warning("Section %s returned invalid JSON (attempt %s): %s", section_name, attempt + 1, e)
+            continue
+        if isinstance(parsed, dict):
+            data = parsed
+        missing = _missing_keys(section_name, parsed)
+        if not missing:
+            return data
+        log.warning("Section %s missing keys %s (attempt %s)", section_name, missing, attempt + 1)
+    return data
+
+def groq_post(body_template, prompt, timeout):
+    body = body_template.replace(_GROQ_PROMPT_SLOT, json_dumps(prompt), 1)
+    # httpx takes raw bytes as content=, requests as data=
+    raw = {"content": body} if HTTP2_CLIENT is not SESSION else {"data": body}
+    return HTTP2_CLIENT.post(GROQ_URL, headers=GROQ_HEADERS, timeout=timeout, **raw)
+
+
+def section_prompt_fields(vehicle_info):
+    """Vehicle placeholders shared by every SECTION_PROMPTS template."""
     v = vehicle_info
     vehicle_str = f"{v.get('year', '?')} {v.get('make', '?')} {v.get('model', '?')}"
     if v.get('trim'):
         vehicle_str += f" {v['trim']}"
+    mileage_val = v.get('mileage', 0)
+    price_val = v.get('price', 0)
+    return {
+        "vehicle_str": vehicle_str,
+        "year": v.get('year', '?'),
+        "make": v.get('make', '?'),
+        "model": v.get('model', '?'),
+        "make_lower": str(v.get('make', '')).lower(),
+        "mileage": f"{mileage_val:,} miles" if isinstance(mileage_val, (int, float)) and mileage_val else "unknown",
+        "price": f"${price_val:,}" if isinstance(price_val, (int, float)) and price_val else "unknown",
+    }
+
 
+def generate_section(section_name, vehicle_info, data_context_str, fields=None):
+    """Generate a single section using a focused mini-prompt. fields is
+    section_prompt_fields(vehicle_info), passed in when generating several."""
     prompt_template = SECTION_PROMPTS.get(section_name)
     if not prompt_template:
-        log.error(f"No prompt template for section: {section_name}")
+        log.error("No prompt template for section: %s", section_name)
         return None
 
-    mileage_val = v.get('mileage', 0)
-    mileage_str = f"{mileage_val:,} miles" if isinstance(mileage_val, (int, float)) and mileage_val else "unknown"
-    price_val = v.get('price', 0)
-    price_str = f"${price_val:,}" if isinstance(price_val, (int, float)) and price_val else "unknown"
-
-    prompt = prompt_template.format(
-        vehicle_str=vehicle_str,
-        data_context=data_context_str,
-        year=v.get('year', '?'),
-        make=v.get('make', '?'),
-        model=v.get('model', '?'),
-        make_lower=str(v.get('make', '')).lower(),
-        mileage=mileage_str,
-        price=price_str,
-    )
+    if fields is None:
+        fields = section_prompt_fields(vehicle_info)
+    prompt = prompt_template.format_map({**fields, "data_context": data_context_str})
 
-    try:
-        resp = requests.post(GROQ_URL, json={
-            "model": GROQ_MODEL,
-            "messages": [
-                {"role": "system", "content": "You are a car buying expert. Return ONLY valid JSON matching the requested schema. No markdown, no explanation â just the JSON object."},
-                {"role": "user", "content": prompt}
-            ],
-            "temperature": 0.15,
-            "max_tokens": 3000,
-            "response_format": {"type": "json_object"}
-        }, headers={
-            "Authorization": f"Bearer {GROQ_API_KEY}",
-            "Content-Type": "application/json"
-        }, timeout=30)
+    cache_key = prompt_cache_key(_GROQ_CACHE_NS, section_name, prompt)
+    cached = _GROQ_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
 
-        if resp.status_code == 200:
-            content = resp.json()["choices"][0]["message"]["content"]
-            return json.loads(content)
-        else:
-            log.error(f"Section {section_name} LLM error: {resp.status_code} - {resp.text[:200]}")
+    try:
+        section = groq_json(_SECTION_BODY, section_name, prompt, timeout=30)
+        if section is not None:
+            if not _missing_keys(section_name, section):
+                _GROQ_CACHE.set(cache_key, section)
+            return section
     except Exception as e:
-        log.error(f"Section {section_name} generation failed: {e}")
+        log.error("Section %s generation failed: %s", section_name, e)
     return None
 
 
@@ -1344,7 +1677,7 @@ def generate_overall_score(vehicle_info, sections):
     prompt = f"""Based on these section analyses for a {vehicle_str}, generate an overall buying confidence score.
 
 SECTIONS:
-{json.dumps(sections, indent=2, default=str)[:6000]}
+{json_dumps(sections, sort_keys=True).decode()[:6000]}
 
 OUTPUT FORMAT (JSON):
 {{
@@ -1355,35 +1688,53 @@ OUTPUT FORMAT (JSON):
 
 Score guide: 8+ = great buy, 6-8 = solid, 4-6 = proceed with caution, <4 = think twice"""
 
+    cache_key = prompt_cache_key(_GROQ_CACHE_NS, "overall_score", prompt)
+    cached = _GROQ_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
     try:
-        resp = requests.post(GROQ_URL, json={
-            "model": GROQ_MODEL,
-            "messages": [
-                {"role": "system", "content": "Return ONLY valid JSON. No explanation."},
-                {"role": "user", "content": prompt}
-            ],
-            "temperature": 0.1,
-            "max_tokens": 500,
-            "response_format": {"type": "json_object"}
-        }, headers={
-            "Authorization": f"Bearer {GROQ_API_KEY}",
-            "Content-Type": "application/json"
-        }, timeout=15)
-        if resp.status_code == 200:
-            return json.loads(resp.json()["choices"][0]["message"]["content"])
+        overall = groq_json(_SCORE_BODY, "overall_score", prompt, timeout=15)
+        if overall is not None and not _missing_keys("overall_score", overall):
+            overall["score"] = float(overall["score"])
+            _GROQ_CACHE.set(cache_key, overall)
+            return overall
     except Exception as e:
-        log.error(f"Overall score generation failed: {e}")
+        log.error("Overall score generation failed: %s", e)
     return {"score": 5.0, "label": "Neutral", "one_liner": f"Report generated for {vehicle_str}"}
 
 
-def generate_analysis_pipeline(vehicle_info, market_data, nhtsa_data, dealer_rep, listing_text="", vin_decode=None):
+_RESEARCH_TOPICS = (model_year_queries, owner_feedback_queries, dealer_questions_queries)
+
+def start_research(year, make, model, trim=None):
+    """Submit every Exa query of the three research topics (model year,
+    owner, dealer) to RESEARCH_EXECUTOR at once; returns one pending
+    (futures, max_chars) per topic for collect_research()."""
+    if not EXA_API_KEY:
+        return tuple(((), 0) for _ in _RESEARCH_TOPICS)
+    pending = []
+    for topic in _RESEARCH_TOPICS:
+        queries, max_chars = topic(year, make, model, trim)
+        pending.append(([RESEARCH_EXECUTOR.submit(_exa_search, q, 3, max_chars) for q in queries], max_chars))
+    return tuple(pending)
+
+
+def collect_research(pending, label):
+    """Wait for one start_research() topic and merge its results (None when
+    nothing came back)."""
+    futures, max_chars = pending
+    return _merge_exa_results([future_result(f, [], label) for f in futures], max_chars)
+
+
+def generate_analysis_pipeline(vehicle_info, market_data, nhtsa_data, dealer_rep, listing_text="", vin_decode=None, progress=None, research=None):
     """
     v9.1 PIPELINE: Section-by-section report generation.
     Each section gets its own targeted research + focused LLM call.
     No more single monolithic prompt that hallucinates when data is thin.
+    progress(event, payload), if given, is called as each phase/section lands.
+    research is start_research()'s pending topics when the caller started it early.
     """
-    import concurrent.futures
-
+    emit = progress or (lambda event, payload=None: None)
     v = vehicle_info
     year = v.get("year")
     make = v.get("make")
@@ -1395,23 +1746,17 @@ def generate_analysis_pipeline(vehicle_info, market_data, nhtsa_data, dealer_rep
     # =====================================================
     # PHASE 1: Parallel targeted research (3 Exa searches)
     # =====================================================
-    log.info(f"Pipeline Phase 1: Parallel research for {vehicle_str}")
-
-    model_year_research = None
-    owner_research = None
-    dealer_research = None
-
-    with concurrent.futures.ThreadPoolExecutor(max_workers=3) as ex:
-        fut_model = ex.submit(research_model_year, year, make, model, trim)
-        fut_owner = ex.submit(research_owner_feedback, year, make, model, trim)
-        fut_dealer = ex.submit(research_dealer_questions, year, make, model, trim)
+    log.info("Pipeline Phase 1: Parallel research for %s", vehicle_str)
 
-        model_year_research = fut_model.result()
-        owner_research = fut_owner.result()
-        dealer_research = fut_dealer.result()
+    pending_model, pending_owner, pending_dealer = research or start_research(year, make, model, trim)
+    model_year_research = collect_research(pending_model, "Model year research")
+    owner_research = collect_research(pending_owner, "Owner research")
+    dealer_research = collect_research(pending_dealer, "Dealer research")
 
-    log.info(f"Research complete: model_year={'yes' if model_year_research else 'no'}, "
-             f"owner={'yes' if owner_research else 'no'}, dealer={'yes' if dealer_research else 'no'}")
+    log.info("Research complete: model_year=%s, owner=%s, dealer=%s",
+             "yes" if model_year_research else "no", "yes" if owner_research else "no",
+             "yes" if dealer_research else "no")
+    emit("research", {"model_year": bool(model_year_research), "owner": bool(owner_research), "dealer": bool(dealer_research)})
 
     # =====================================================
     # PHASE 2: Build section-specific data contexts
@@ -1434,10 +1779,16 @@ def generate_analysis_pipeline(vehicle_info, market_data, nhtsa_data, dealer_rep
         if n.get("top_complaint_areas"):
             areas = ", ".join(f"{a} ({c})" for a, c in n["top_complaint_areas"][:8])
             s2_parts.append(f"  Complaint breakdown: {areas}")
-        for c in n.get("complaints_raw", [])[:8]:
+        # At most 2 excerpts per component so the 8 we send span several areas
+        per_comp = {}
+        shown = 0
+        for c in n.get("complaints_raw", []):
+            if shown >= 8: break
             summary = str(c.get("summary", ""))[:200]
             comp = c.get("components", "")
-            if summary:
+            if summary and per_comp.get(comp, 0) < 2:
+                per_comp[comp] = per_comp.get(comp, 0) + 1
+                shown += 1
                 s2_parts.append(f"  COMPLAINT [{comp}]: {summary}")
     else:
         s2_parts.append("\nNo NHTSA data available.")
@@ -1492,7 +1843,7 @@ def generate_analysis_pipeline(vehicle_info, market_data, nhtsa_data, dealer_rep
     # =====================================================
     # PHASE 3: Parallel section generation (5 LLM calls)
     # =====================================================
-    log.info(f"Pipeline Phase 3: Generating 5 sections in parallel for {vehicle_str}")
+    log.info("Pipeline Phase 3: Generating 5 sections in parallel for %s", vehicle_str)
 
     sections = {}
     section_configs = [
@@ -1503,10 +1854,11 @@ def generate_analysis_pipeline(vehicle_info, market_data, nhtsa_data, dealer_rep
         ("dealer_questions", s5_context),
     ]
 
+    fields = section_prompt_fields(vehicle_info)
     with concurrent.futures.ThreadPoolExecutor(max_workers=5) as ex:
         futures = {}
         for section_name, context in section_configs:
-            futures[ex.submit(generate_section, section_name, vehicle_info, context)] = section_name
+            futures[ex.submit(generate_section, section_name, vehicle_info, context, fields)] = section_name
 
         for future in concurrent.futures.as_completed(futures):
             section_name = futures[future]
@@ -1514,19 +1866,21 @@ def generate_analysis_pipeline(vehicle_info, market_data, nhtsa_data, dealer_rep
                 result = future.result()
                 if result:
                     sections[section_name] = result
-                    log.info(f"Section {section_name}: generated OK")
+                    log.info("Section %s: generated OK", section_name)
                 else:
-                    log.warning(f"Section {section_name}: returned None")
+                    log.warning("Section %s: returned None", section_name)
                     sections[section_name] = {"error": "Section generation failed"}
             except Exception as e:
-                log.error(f"Section {section_name} error: {e}")
+                log.error("Section %s error: %s", section_name, e)
                 sections[section_name] = {"error": str(e)}
+            emit("section", {"name": section_name, "data": sections[section_name]})
 
     # =====================================================
     # PHASE 4: Overall score (quick final LLM call)
     # =====================================================
-    log.info(f"Pipeline Phase 4: Generating overall score for {vehicle_str}")
+    log.info("Pipeline Phase 4: Generating overall score for %s", vehicle_str)
     overall = generate_overall_score(vehicle_info, sections)
+    emit("score", overall)
 
     # =====================================================
     # PHASE 5: Assemble final report
@@ -1536,7 +1890,7 @@ def generate_analysis_pipeline(vehicle_info, market_data, nhtsa_data, dealer_rep
         **sections
     }
 
-    log.info(f"Pipeline complete for {vehicle_str}: {len(sections)} sections generated")
+    log.info("Pipeline complete for %s: %s sections generated", vehicle_str, len(sections))
     return analysis
 
 
@@ -1545,9 +1899,38 @@ def generate_analysis_pipeline(vehicle_info, market_data, nhtsa_data, dealer_rep
 # ORCHESTRATOR ÃÂÃÂ¢ÃÂÃÂÃÂÃÂ now with VIN decode + web research
 # ==============================================================
 
-def analyze_listing(input_data):
+# Comp stats returned to the client; mileage_prices only feeds the price prompt
+_MARKET_OUT_FIELDS = ("avg_price", "median_price", "min_price", "max_price", "percentile",
+                      "deal_score", "savings", "comp_count", "total_market", "price_buckets")
+
+# Fields that identify a listing; the rest of the vehicle dict is derived
+_REPORT_ID_FIELDS = ("vin", "year", "make", "model", "trim", "price", "mileage", "zip")
+
+def report_id(vehicle):
+    """12-hex id, stable for the same car at the same price and mileage."""
+    key = tuple(vehicle.get(f) for f in _REPORT_ID_FIELDS)
+    return hashlib.blake2b(repr(key).encode(), digest_size=6).hexdigest()
+
+
+# Longest each market/NHTSA/dealer call may run before the report goes out
+# without it (reported as missing data, like a failed call). Counted from
+# when a worker picks the call up; ENRICH_QUEUE_TIMEOUT bounds the wait for
+# a free EXECUTOR worker under load.
+ENRICH_TIMEOUT = 20
+ENRICH_QUEUE_TIMEOUT = 30
+# Same, for the URL-phase calls (listing scrape, vPIC decode, Auto.dev VIN
+# record). The scrape can chain a 15s Exa call and the 12s page fallback.
+LOOKUP_TIMEOUT = 30
+
+
+def analyze_listing(input_data, progress=None):
+    emit = progress or (lambda event, payload=None: None)
     vehicle = {}
     listing_text = ""
+    url_vin = None
+    fut_vin = None
+    vin_row = {}
+    vin_listing = None
 
     if input_data.get("url"):
         url = input_data["url"]
@@ -1555,7 +1938,21 @@ def analyze_listing(input_data):
         url_vin = extract_vin_from_url(url)
         if url_vin:
             vehicle["vin"] = url_vin
-            log.info(f"VIN from URL: {url_vin}")
+            log.info("VIN from URL: %s", url_vin)
+
+        # Fire every call that only needs the URL or the URL VIN right away;
+        # results are merged below in the same precedence order as before.
+        # The page scrape is skipped when the user already typed in the
+        # identity (make, model, VIN): manual fields override it anyway, and
+        # the Auto.dev VIN record fills in price, photos and dealer.
+        fut_scrape = None
+        if not all(input_data.get(k) for k in ("make", "model", "vin")):
+            fut_scrape = submit_tracked(scrape_listing_exa, url)
+        fut_decode = None
+        if url_vin:
+            fut_decode = submit_tracked(nhtsa_vin_decode, url_vin)
+            if AUTODEV_API_KEY:
+                fut_vin = submit_tracked(lookup_vin_autodev, url_vin)
 
         # Step 2: Extract year/make/model from URL path
         url_ymm = extract_ymm_from_url(url)
@@ -1563,26 +1960,35 @@ def analyze_listing(input_data):
             if v and not vehicle.get(k): vehicle[k] = v
 
         # Step 3: If we have a VIN, decode via NHTSA (FREE, authoritative)
-        if vehicle.get("vin"):
-            nhtsa_info = nhtsa_vin_decode(vehicle["vin"])
-            for k, v in nhtsa_info.items():
+        if fut_decode:
+            vin_row = join_running(fut_decode, LOOKUP_TIMEOUT, "NHTSA VIN decode", ENRICH_QUEUE_TIMEOUT, {})
+            for k, v in vin_identity(vin_row, url_vin).items():
                 if v and not vehicle.get(k): vehicle[k] = v
 
-        # Step 4: Scrape for price, mileage, photos, dealer info
-        scrape_result = scrape_listing_exa(url)
-        if isinstance(scrape_result, tuple):
-            listing_text, images = scrape_result
-            if images: vehicle["photos"] = images[:5]
+        # Step 4: Scrape for price, mileage, photos, dealer info -- unless the
+        # Auto.dev record for the URL VIN (the same listing) already has them,
+        # in which case the slower page scrape isn't waited on
+        vin_listing = join_running(fut_vin, LOOKUP_TIMEOUT, "Auto.dev VIN lookup", ENRICH_QUEUE_TIMEOUT)
+        if fut_scrape is None:
+            log.info("Skipping listing scrape: make, model and VIN were provided")
+        elif vin_listing and vin_listing.get("price") and vin_listing.get("mileage") and vin_listing.get("photoUrls"):
+            fut_scrape.cancel()
+            log.info("Skipping listing scrape: Auto.dev VIN record is complete")
         else:
-            listing_text = scrape_result
-        if listing_text:
-            extracted = extract_vehicle_from_text(listing_text)
-            for k, val in extracted.items():
-                if val and not vehicle.get(k): vehicle[k] = val
+            scrape_result = join_running(fut_scrape, LOOKUP_TIMEOUT, "Listing scrape", ENRICH_QUEUE_TIMEOUT, "")
+            if isinstance(scrape_result, tuple):
+                listing_text, images = scrape_result
+                if images: vehicle["photos"] = images[:5]
+            else:
+                listing_text = scrape_result
+            if listing_text:
+                extracted = extract_vehicle_cached(listing_text)
+                for k, val in extracted.items():
+                    if val and not vehicle.get(k): vehicle[k] = val
 
         # Step 5: If found VIN in HTML but not from URL, decode that too
         if vehicle.get("vin") and not vehicle.get("make"):
-            nhtsa_info2 = nhtsa_vin_decode(vehicle["vin"])
+            nhtsa_info2 = vin_identity(nhtsa_vin_decode(vehicle["vin"]), vehicle["vin"])
             for k, v in nhtsa_info2.items():
                 if v and not vehicle.get(k): vehicle[k] = v
 
@@ -1597,9 +2003,12 @@ def analyze_listing(input_data):
     if not vehicle.get("make") or not vehicle.get("model"):
         return {"error": "Couldn't identify the car. Try a different listing URL or enter details manually."}
 
+    # Prefetched VIN lookups only apply if the VIN wasn't overridden since
+    vin_prefetched = bool(url_vin) and vehicle.get("vin") == url_vin
+
     # VIN enrichment via Auto.dev
     if vehicle.get("vin") and AUTODEV_API_KEY:
-        vin_data = lookup_vin_autodev(vehicle["vin"])
+        vin_data = vin_listing if (vin_prefetched and fut_vin) else lookup_vin_autodev(vehicle["vin"])
         if vin_data:
             for k in ["year", "make", "model", "trim", "price", "mileage", "engine",
                        "transmission", "drivetrain", "fuelType", "mpgCity", "mpgHighway", "bodyType"]:
@@ -1619,12 +2028,31 @@ def analyze_listing(input_data):
         try: vehicle["year"] = int(vehicle["year"])
         except: pass
 
-    log.info(f"Analyzing: {vehicle.get('year')} {vehicle.get('make')} {vehicle.get('model')} - ${vehicle.get('price', '?')}")
+    log.info("Analyzing: %s %s %s - $%s", vehicle.get('year'), vehicle.get('make'), vehicle.get('model'), vehicle.get('price', '?'))
+    emit("vehicle", dict(vehicle))
 
-    # === STEP 1: VIN decode via NHTSA for exact specs ===
+    # === STEP 1: Market comps + NHTSA + dealer reputation, in flight while we merge specs ===
+    fut_market = None
+    if vehicle.get("make") and vehicle.get("model"):
+        fut_market = submit_tracked(
+            get_market_comps,
+            vehicle.get("year"), vehicle["make"], vehicle["model"],
+            vehicle.get("trim"), vehicle.get("zip") or DEFAULT_ZIP, vehicle.get("price")
+        )
+    fut_nhtsa = None
+    if vehicle.get("year") and vehicle.get("make") and vehicle.get("model"):
+        fut_nhtsa = submit_tracked(get_nhtsa_data, vehicle["year"], vehicle["make"], vehicle["model"])
+    fut_dealer = None
+    # Very short names ("A", "N/A") are scrape noise and only return junk reviews
+    if len(str(vehicle.get("dealer_name") or "").strip()) > 3:
+        fut_dealer = submit_tracked(get_dealer_reputation, vehicle["dealer_name"], vehicle.get("zip"))
+
+    # === STEP 2: VIN decode via NHTSA for exact specs ===
     vin_decode = None
     if vehicle.get("vin"):
-        vin_decode = decode_vin_nhtsa(vehicle["vin"])
+        # Same vPIC row as the step 3 decode; refetched (or a cache hit) only
+        # when the VIN changed since
+        vin_decode = vin_specs(vin_row if vin_prefetched and vin_row else nhtsa_vin_decode(vehicle["vin"]))
         if vin_decode:
             # Enrich vehicle with decoded data
             if vin_decode.get("trim") and not vehicle.get("trim"):
@@ -1634,46 +2062,30 @@ def analyze_listing(input_data):
             if vin_decode.get("transmission") and not vehicle.get("transmission"):
                 vehicle["transmission"] = vin_decode["transmission"]
 
-    # === STEP 2: Market comps ===
-    market_data = None
-    if vehicle.get("make") and vehicle.get("model"):
-        market_data = get_market_comps(
-            vehicle.get("year"), vehicle["make"], vehicle["model"],
-            vehicle.get("trim"), vehicle.get("zip") or DEFAULT_ZIP, vehicle.get("price")
-        )
+    # Research only needs the final year/make/model/trim, so it runs while
+    # the step 1 calls are joined below
+    research = start_research(vehicle.get("year"), vehicle["make"], vehicle["model"], vehicle.get("trim"))
 
-    # === STEP 3: NHTSA recalls + complaints ===
-    nhtsa_data = None
-    if vehicle.get("year") and vehicle.get("make") and vehicle.get("model"):
-        nhtsa_data = get_nhtsa_data(vehicle["year"], vehicle["make"], vehicle["model"])
+    # === STEP 3: Join the fan-out; each call gets ENRICH_TIMEOUT of run time ===
+    market_data = join_running(fut_market, ENRICH_TIMEOUT, "Market comps", ENRICH_QUEUE_TIMEOUT)
+    nhtsa_data = join_running(fut_nhtsa, ENRICH_TIMEOUT, "NHTSA data", ENRICH_QUEUE_TIMEOUT)
+    emit("market", {"comp_count": market_data["comp_count"] if market_data else 0,
+                    "recall_count": nhtsa_data["recall_count"] if nhtsa_data else None})
 
-    # === STEP 4: Dealer reputation ===
-    dealer_rep = None
-    if vehicle.get("dealer_name"):
-        dealer_rep = get_dealer_reputation(vehicle["dealer_name"], vehicle.get("zip"))
+    # === STEP 4: Dealer reputation (submitted in step 1) ===
+    dealer_rep = join_running(fut_dealer, ENRICH_TIMEOUT, "Dealer reputation", ENRICH_QUEUE_TIMEOUT)
 
     # === STEP 5: Web research now handled inside pipeline ===
 
     # === STEP 6: Generate AI analysis ===
-    analysis = generate_analysis_pipeline(vehicle, market_data, nhtsa_data, dealer_rep, listing_text, vin_decode)
+    analysis = generate_analysis_pipeline(vehicle, market_data, nhtsa_data, dealer_rep, listing_text, vin_decode, progress, research)
 
     if not analysis:
         return {"error": "Analysis generation failed. Please try again."}
 
     return {
         "vehicle": vehicle,
-        "market_data": {
-            "avg_price": market_data["avg_price"] if market_data else None,
-            "median_price": market_data["median_price"] if market_data else None,
-            "min_price": market_data["min_price"] if market_data else None,
-            "max_price": market_data["max_price"] if market_data else None,
-            "percentile": market_data["percentile"] if market_data else None,
-            "deal_score": market_data["deal_score"] if market_data else None,
-            "savings": market_data["savings"] if market_data else None,
-            "comp_count": market_data["comp_count"] if market_data else 0,
-            "total_market": market_data["total_market"] if market_data else 0,
-            "price_buckets": market_data["price_buckets"] if market_data else [],
-        } if market_data else None,
+        "market_data": {k: market_data[k] for k in _MARKET_OUT_FIELDS} if market_data else None,
         "nhtsa_data": {
             "recall_count": nhtsa_data["recall_count"] if nhtsa_data else None,
             "complaint_count": nhtsa_data["complaint_count"] if nhtsa_data else None,
@@ -1681,10 +2093,11 @@ def analyze_listing(input_data):
             "risk_label": nhtsa_data["risk_label"] if nhtsa_data else "No data",
             "top_complaint_areas": nhtsa_data["top_complaint_areas"][:5] if nhtsa_data else [],
             "data_source": "NHTSA model-year lookup (not VIN-specific)" if nhtsa_data else "unavailable",
+            "degraded": bool(nhtsa_data and nhtsa_data.get("degraded")),
         },
         "analysis": analysis,
         "generated_at": datetime.utcnow().isoformat(),
-        "report_id": hashlib.md5(json.dumps(vehicle, sort_keys=True, default=str).encode()).hexdigest()[:12],
+        "report_id": report_id(vehicle),
         "version": "9.1.0"
     }
 
@@ -1693,69 +2106,170 @@ def analyze_listing(input_data):
 # API ROUTES
 # ==============================================================
 
+# The frontend is a static page: read it once at import and let browsers
+# revalidate with the ETag instead of re-downloading it (a deploy restarts
+# the process, which picks up the new file and a new ETag).
+_INDEX_PATH = os.path.join(os.path.dirname(__file__), "index.html")
+_INDEX_BODY = None
+_INDEX_ETAG = None
+if os.path.exists(_INDEX_PATH):
+    with open(_INDEX_PATH, "rb") as f:
+        _INDEX_BODY = f.read()
+    _INDEX_ETAG = hashlib.blake2b(_INDEX_BODY, digest_size=8).hexdigest()
+
 @app.route("/")
 def home():
-    html_path = os.path.join(os.path.dirname(__file__), "index.html")
-    if os.path.exists(html_path):
-        with open(html_path) as f:
-            from flask import make_response
-            resp = make_response(f.read())
-            resp.headers['Content-Type'] = 'text/html; charset=utf-8'
-            resp.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
-            resp.headers['Pragma'] = 'no-cache'
-            resp.headers['Expires'] = '0'
-            return resp
-    return "<h1>AskCarBuddy</h1><p>Frontend not found.</p>"
+    if _INDEX_BODY is None:
+        return "<h1>AskCarBuddy</h1><p>Frontend not found.</p>"
+    resp = app.response_class(_INDEX_BODY, mimetype="text/html")
+    resp.set_etag(_INDEX_ETAG)
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp.make_conditional(request)
+
+def save_report_trace(data, report, total_ms):
+    """Save the trace row for a finished report; returns its id, or None if
+    the save failed (the report is still served)."""
+    try:
+        v = report.get("vehicle", {})
+        a = report.get("analysis", {})
+        os_data = a.get("overall_score", {}) if isinstance(a, dict) else {}
+        pa_data = a.get("price_analysis", {}) if isinstance(a, dict) else {}
+        return save_trace({
+            "url": data.get("url", ""),
+            "year": v.get("year", ""),
+            "make": v.get("make", ""),
+            "model": v.get("model", ""),
+            "trim": v.get("trim", ""),
+            "price": v.get("price"),
+            "mileage": v.get("mileage"),
+            "prompt_version": "v9.1",
+            "total_time_ms": total_ms,
+            "overall_score": os_data.get("score") if isinstance(os_data, dict) else None,
+            "deal_position": pa_data.get("verdict") if isinstance(pa_data, dict) else None,
+            "mechanical_risk": None,
+            "confidence_level": None,
+            "ai_output_json": json_dumps(a).decode() if a else None
+        })
+    except Exception as te:
+        log.warning("Trace save failed: %s", te)
+        return None
 
-@app.route("/api/analyze", methods=["POST"])
-def api_analyze():
-    data = request.get_json()
-    if not data:
-        return jsonify({"error": "No data provided"}), 400
+def report_cacheable(report):
+    """False for a report missing comps or NHTSA data that should have been
+    there (provider timeout or failure) or built on a stale NHTSA record:
+    caching it would serve a transient gap to everyone for the report TTL."""
+    nhtsa = report.get("nhtsa_data") or {}
+    if nhtsa.get("degraded"):
+        return False
+    if report["vehicle"].get("year") and nhtsa.get("recall_count") is None:
+        return False
+    if AUTODEV_API_KEY and report.get("market_data") is None:
+        return False
+    return True
+
+class AnalysisCancelled(Exception):
+    """Raised from a progress callback to stop an analysis whose client has
+    gone away; the pipeline checks it at every stage it reports."""
+
+def run_analysis(data, progress=None):
+    """Run analyze_listing and save its trace. Returns (report, http_status).
+    Repeat requests within the report TTL get the cached report back, with a
+    trace of their own so feedback signals land on the right row."""
+    cache_key = report_cache_key(data)
     t_start = time.time()
+    cached = _REPORT_CACHE.get(cache_key)
+    if cached is not None:
+        log.info("Report cache hit: %s", data.get('url', ''))
+        report = {**cached, "cached": True}
+        trace_id = save_report_trace(data, report, (time.time() - t_start) * 1000)
+        if trace_id: report["trace_id"] = trace_id
+        return report, 200
     try:
-        report = analyze_listing(data)
+        report = analyze_listing(data, progress)
         total_ms = (time.time() - t_start) * 1000
         if "error" in report:
             try:
                 save_trace({"url": data.get("url",""), "error": report["error"], "total_time_ms": total_ms, "prompt_version": "v9.1"})
             except Exception:
                 pass
-            return jsonify(report), 400
+            return report, 400
         # === SELF-IMPROVING AGENT: Save trace ===
-        try:
-            v = report.get("vehicle", {})
-            a = report.get("analysis", {})
-            os_data = a.get("overall_score", {}) if isinstance(a, dict) else {}
-            pa_data = a.get("price_analysis", {}) if isinstance(a, dict) else {}
-            trace_id = save_trace({
-                "url": data.get("url", ""),
-                "year": v.get("year", ""),
-                "make": v.get("make", ""),
-                "model": v.get("model", ""),
-                "trim": v.get("trim", ""),
-                "price": v.get("price"),
-                "mileage": v.get("mileage"),
-                "prompt_version": "v9.1",
-                "total_time_ms": total_ms,
-                "overall_score": os_data.get("score") if isinstance(os_data, dict) else None,
-                "deal_position": pa_data.get("verdict") if isinstance(pa_data, dict) else None,
-                "mechanical_risk": None,
-                "confidence_level": None,
-                "ai_output_json": json.dumps(a) if a else None
-            })
-            report["trace_id"] = trace_id
-        except Exception as te:
-            log.warning(f"Trace save failed: {te}")
-        return jsonify(report)
+        if report_cacheable(report):
+            _REPORT_CACHE.set(cache_key, report)
+        else:
+            log.info("Report not cached: comps or NHTSA data missing or stale")
+        trace_id = save_report_trace(data, report, total_ms)
+        if trace_id:
+            report = {**report, "trace_id": trace_id}
+        return report, 200
+    except AnalysisCancelled:
+        log.info("Analysis cancelled (client disconnected): %s", data.get('url', ''))
+        return {"error": "Analysis cancelled"}, 499
     except Exception as e:
-        log.error(f"Analysis error: {e}")
+        log.error("Analysis error: %s", e)
         total_ms = (time.time() - t_start) * 1000
         try:
             save_trace({"url": data.get("url",""), "error": str(e), "total_time_ms": total_ms, "prompt_version": "v9.1"})
         except Exception:
             pass
-        return jsonify({"error": "Something went wrong. Please try again."}), 500
+        return {"error": "Something went wrong. Please try again."}, 500
+
+
+@app.route("/api/analyze", methods=["POST"])
+def api_analyze():
+    data = request.get_json()
+    if not data:
+        return jsonify({"error": "No data provided"}), 400
+    report, status = run_analysis(data)
+    return jsonify(report), status
+
+# Streamed analyses run here rather than on a thread per request, so
+# abandoned or piled-up streams can't grow the thread count without bound
+STREAM_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=8)
+
+@app.route("/api/analyze/stream", methods=["POST"])
+def api_analyze_stream():
+    """Same as /api/analyze, but as Server-Sent Events: vehicle, market,
+    research, one section event per finished section, score, then the full
+    report (or error). The analysis runs on STREAM_EXECUTOR and feeds a
+    queue; once the client disconnects it stops at its next stage."""
+    data = request.get_json()
+    if not data:
+        return jsonify({"error": "No data provided"}), 400
+    events = queue.Queue()
+    cancelled = threading.Event()
+
+    def progress(event, payload=None):
+        if cancelled.is_set():
+            raise AnalysisCancelled()
+        events.put((event, payload))
+
+    def run():
+        try:
+            if cancelled.is_set():
+                return
+            report, status = run_analysis(data, progress)
+            events.put(("report" if status == 200 else "error", report))
+        finally:
+            events.put(None)
+
+    STREAM_EXECUTOR.submit(run)
+
+    def stream():
+        try:
+            while True:
+                item = events.get()
+                if item is None:
+                    return
+                event, payload = item
+                yield b"event: " + event.encode() + b"\ndata: " + json_dumps(payload) + b"\n\n"
+        finally:
+            # Also reached via GeneratorExit when the client goes away
+            cancelled.set()
+
+    return Response(stream(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 
 @app.route("/api/parse-url", methods=["POST"])
 def api_parse_url():
@@ -1765,12 +2279,22 @@ def api_parse_url():
         return jsonify({"error": "No URL provided"}), 400
     return jsonify(parse_listing_url(url))
 
+# Parts of /health fixed at startup (keys come from env, read once)
+_HEALTH_STATIC = {
+    "status": "ok", "service": "AskCarBuddy", "version": "9.1.0",
+    "apis": {"groq": bool(GROQ_API_KEY), "autodev": bool(AUTODEV_API_KEY), "exa": bool(EXA_API_KEY)},
+    "redis": REDIS is not None,
+}
+
 @app.route("/health", methods=["GET"])
 def health():
-    return jsonify({
-        "status": "ok", "service": "AskCarBuddy", "version": "9.1.0",
-        "apis": {"groq": bool(GROQ_API_KEY), "autodev": bool(AUTODEV_API_KEY), "exa": bool(EXA_API_KEY)}
+    resp = jsonify({
+        **_HEALTH_STATIC,
+        "caches": {c.name: c.stats() for c in CACHES},
+        "circuits": {NHTSA_BREAKER.name: "open" if NHTSA_BREAKER.is_open else "closed"},
     })
+    resp.headers['Cache-Control'] = 'no-store'
+    return resp
 
 
 
@@ -1818,7 +2342,7 @@ def api_learning():
         stats = get_learning_stats()
         return jsonify(stats)
     except Exception as e:
-        log.error(f"Learning stats error: {e}")
+        log.error("Learning stats error: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @app.route("/admin/brain")
@@ -1828,5 +2352,5 @@ def admin_brain():
 
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 5000))
-    log.info(f"AskCarBuddy v7.0 starting on port {port}")
+    log.info("AskCarBuddy v7.0 starting on port %s", port)
     app.run(host="0.0.0.0", port=port, debug=False)
@@ -0,0 +1,13 @@
+# Gunicorn settings, read automatically from the working directory.
+# An analysis holds its request thread for several seconds on Groq/Exa, so
+# workers are threaded; size them per instance with the env vars below.
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+# Idle keep-alive; gunicorn's default of 2s drops the connection before the
+# client's follow-up requests (stream, feedback signals) can reuse it.
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
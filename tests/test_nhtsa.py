@@ -0,0 +1,76 @@
+"""NHTSA recalls/complaints: conditional revalidation of expired records
+and the stale fallback when NHTSA is failing."""
+import os
+import sys
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import app  # noqa: E402
+
+
+class FakeResponse:
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+
+RECALLS = b'{"results": [{"Component": "BRAKES", "Summary": "brake issue", "Remedy": "fix"}]}'
+COMPLAINTS = b'{"results": [{"components": "ENGINE", "summary": "stalls"}]}'
+
+
+@pytest.fixture
+def nhtsa(monkeypatch):
+    """Fresh cache whose entries expire at once (so every lookup revalidates
+    and stale reads still see them), a fresh breaker, and a scripted
+    SESSION.get. Set nhtsa.mode to "fresh", "etag" or "down"."""
+    monkeypatch.setattr(app, "_NHTSA_CACHE", app.TTLCache(maxsize=16, ttl=0))
+    monkeypatch.setattr(app, "NHTSA_BREAKER", app.CircuitBreaker("nhtsa-test"))
+
+    class Server:
+        mode = "fresh"
+        requests = []
+
+    def fake_get(url, params=None, headers=None, timeout=None):
+        headers = headers or {}
+        Server.requests.append((url, dict(headers)))
+        if Server.mode == "down":
+            raise requests.ConnectionError("NHTSA unreachable")
+        recalls = url == app.NHTSA_RECALLS_URL
+        etag = '"r1"' if recalls else '"c1"'
+        if Server.mode == "etag" and headers.get("If-None-Match") == etag:
+            return FakeResponse(304)
+        return FakeResponse(200, RECALLS if recalls else COMPLAINTS, {"ETag": etag})
+
+    monkeypatch.setattr(app.SESSION, "get", fake_get)
+    return Server
+
+
+def test_304_reuses_the_cached_record(nhtsa):
+    first = app.get_nhtsa_data(2019, "Toyota", "Camry")
+    assert first["recall_count"] == 1 and first["complaint_count"] == 1
+    nhtsa.mode = "etag"
+    nhtsa.requests.clear()
+    second = app.get_nhtsa_data(2019, "Toyota", "Camry")
+    # Both endpoints were asked conditionally and answered 304
+    assert sorted(h.get("If-None-Match") for _, h in nhtsa.requests) == ['"c1"', '"r1"']
+    assert second == first
+    assert not second.get("degraded")
+
+
+def test_outage_serves_the_stale_record(nhtsa):
+    first = app.get_nhtsa_data(2019, "Toyota", "Camry")
+    nhtsa.mode = "down"
+    second = app.get_nhtsa_data(2019, "Toyota", "Camry")
+    assert second["degraded"] is True
+    assert second["recall_count"] == first["recall_count"]
+    assert second["recalls"] == first["recalls"]
+
+
+def test_outage_without_a_stale_record_is_degraded_and_not_cached(nhtsa):
+    nhtsa.mode = "down"
+    result = app.get_nhtsa_data(2019, "Toyota", "Camry")
+    assert result["degraded"] is True
+    assert app._NHTSA_CACHE.get((2019, "toyota", "camry"), allow_stale=True) is None
@@ -0,0 +1,25 @@
+"""Regression tests for the price/mileage parsers."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import app  # noqa: E402
+
+
+def test_parse_price_rejects_oversized_digit_run():
+    assert app.parse_price("9" * 400) is None
+    assert app.parse_price("$" + "9" * 400 + ".99") is None
+
+
+def test_oversized_itemprop_price_does_not_break_extraction():
+    page = '<meta itemprop="price" content="' + "9" * 400 + '"> $18,500 45,000 miles'
+    info = app.extract_vehicle_from_text(page)
+    assert info.get("mileage") == 45000
+
+
+def test_parse_price_and_mileage_basics():
+    assert app.parse_price("$18,995") == 18995
+    assert app.parse_price(0) is None
+    assert app.parse_price("Call for price") is None
+    assert app.parse_mileage("45,000 mi") == 45000
+    assert app.parse_mileage(None) is None
@@ -0,0 +1,77 @@
+"""Report cache: partial reports stay out of it, and every cache hit gets
+a trace of its own."""
+import itertools
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import app  # noqa: E402
+
+MARKET = {"avg_price": 18000, "comp_count": 40}
+
+
+def report(market=MARKET, recall_count=2, degraded=False, year=2019):
+    return {
+        "vehicle": {"year": year, "make": "Toyota", "model": "Camry"},
+        "market_data": market,
+        "nhtsa_data": {"recall_count": recall_count, "degraded": degraded},
+        "analysis": {"overall_score": {"score": 7.5}},
+    }
+
+
+@pytest.fixture(autouse=True)
+def autodev_key(monkeypatch):
+    monkeypatch.setattr(app, "AUTODEV_API_KEY", "test-key")
+
+
+def test_complete_report_is_cacheable():
+    assert app.report_cacheable(report())
+
+
+@pytest.mark.parametrize("partial", [
+    report(market=None),          # comps timed out or failed
+    report(recall_count=None),    # NHTSA missing for a known year
+    report(degraded=True),        # built on a stale NHTSA record
+])
+def test_partial_report_is_not_cacheable(partial):
+    assert not app.report_cacheable(partial)
+
+
+def test_nhtsa_is_not_expected_without_a_year():
+    assert app.report_cacheable(report(recall_count=None, year=None))
+
+
+@pytest.fixture
+def analysis(monkeypatch):
+    """Fresh report cache, a counting save_trace and a scripted analyze_listing."""
+    monkeypatch.setattr(app, "_REPORT_CACHE", app.TTLCache(maxsize=16, ttl=600))
+    ids = itertools.count(1)
+    monkeypatch.setattr(app, "save_trace", lambda data: f"t{next(ids)}")
+    state = {"report": report(), "runs": 0}
+    def analyze(data, progress=None):
+        state["runs"] += 1
+        return dict(state["report"])
+    monkeypatch.setattr(app, "analyze_listing", analyze)
+    return state
+
+
+def test_cache_hit_gets_its_own_trace(analysis):
+    body = {"url": "https://example.com/car"}
+    first, _ = app.run_analysis(body)
+    second, _ = app.run_analysis(body)
+    assert analysis["runs"] == 1
+    assert second["cached"] is True
+    assert first["trace_id"] == "t1" and second["trace_id"] == "t2"
+    cached = app._REPORT_CACHE.get(app.report_cache_key(body))
+    assert "trace_id" not in cached
+
+
+def test_partial_report_is_recomputed(analysis):
+    analysis["report"] = report(market=None)
+    body = {"url": "https://example.com/car"}
+    app.run_analysis(body)
+    again, _ = app.run_analysis(body)
+    assert analysis["runs"] == 2
+    assert "cached" not in again
@@ -0,0 +1,85 @@
+"""CircuitBreaker and the EXECUTOR join helpers (submit_tracked/join_running)."""
+import concurrent.futures
+import os
+import sys
+import time
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import app  # noqa: E402
+
+
+def test_breaker_opens_after_fail_max_and_lets_one_trial_through():
+    breaker = app.CircuitBreaker("test", fail_max=3, reset_timeout=0.05)
+    for _ in range(2):
+        breaker.failure()
+    assert breaker.allow() and not breaker.is_open
+    breaker.failure()
+    assert breaker.is_open and not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()        # the half-open trial
+    assert not breaker.allow()    # everyone else still waits
+    breaker.success()
+    assert not breaker.is_open and breaker.allow()
+
+
+def test_nhtsa_outage_trips_the_breaker_and_stops_calls(monkeypatch):
+    monkeypatch.setattr(app, "NHTSA_BREAKER", app.CircuitBreaker("nhtsa-test", fail_max=2, reset_timeout=60))
+    calls = []
+    def down(url, **kwargs):
+        calls.append(url)
+        raise requests.ConnectionError("down")
+    monkeypatch.setattr(app.SESSION, "get", down)
+    for _ in range(4):
+        assert app._fetch_nhtsa_results(app.NHTSA_RECALLS_URL, 2019, "Toyota", "Camry") == (None, None)
+    assert len(calls) == 2
+
+
+def test_nhtsa_client_errors_do_not_trip_the_breaker(monkeypatch):
+    monkeypatch.setattr(app, "NHTSA_BREAKER", app.CircuitBreaker("nhtsa-test", fail_max=2, reset_timeout=60))
+    class NotFound:
+        status_code = 404
+        headers = {}
+        content = b""
+    monkeypatch.setattr(app.SESSION, "get", lambda url, **kwargs: NotFound())
+    for _ in range(4):
+        app._fetch_nhtsa_results(app.NHTSA_RECALLS_URL, 2019, "Toyota", "Camry")
+    assert not app.NHTSA_BREAKER.is_open
+
+
+@pytest.fixture
+def one_worker(monkeypatch):
+    """A single-worker EXECUTOR, so a blocker makes the next call queue."""
+    ex = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(app, "EXECUTOR", ex)
+    yield ex
+    ex.shutdown(wait=True, cancel_futures=True)
+
+
+def test_join_running_does_not_count_queued_time(one_worker):
+    one_worker.submit(time.sleep, 0.4)
+    fut = app.submit_tracked(lambda: (time.sleep(0.1), "done")[1])
+    # 0.4s queued + 0.1s running exceeds the budget; only running time counts
+    assert app.join_running(fut, 0.3, "queued call", max_queued=5) == "done"
+    assert fut.run_info["started"] - fut.run_info["submitted"] >= 0.3
+
+
+def test_join_running_times_out_on_running_time(one_worker):
+    fut = app.submit_tracked(time.sleep, 1.0)
+    start = time.monotonic()
+    assert app.join_running(fut, 0.1, "slow call", max_queued=5, default="fallback") == "fallback"
+    assert time.monotonic() - start < 0.8
+
+
+def test_join_running_gives_up_on_a_call_stuck_in_the_queue(one_worker):
+    one_worker.submit(time.sleep, 1.0)
+    fut = app.submit_tracked(lambda: "never")
+    assert app.join_running(fut, 5, "stuck call", max_queued=0.1) is None
+    assert fut.cancelled()
+
+
+def test_join_running_absorbs_failures(one_worker):
+    fut = app.submit_tracked(lambda: 1 / 0)
+    assert app.join_running(fut, 5, "bad call", max_queued=5, default={}) == {}